@@ -0,0 +1,38 @@
+"""
+Management command to rebuild the "who to follow" suggestions.
+Meant to run periodically (e.g. nightly from cron).
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import FollowSuggestion
+from accounts.suggestions import active_user_ids, refresh_suggestions
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds follow suggestions for recently active users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of users to refresh per batch',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        user_ids = active_user_ids(now)
+        batch_size = options['batch_size']
+        stored_count = 0
+
+        for start in range(0, len(user_ids), batch_size):
+            stored_count += refresh_suggestions(user_ids[start:start + batch_size], now)
+
+        # Users who are no longer active keep no stale suggestions
+        FollowSuggestion.objects.filter(created_at__lt=now).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'تم حفظ {stored_count} اقتراح متابعة لـ {len(user_ids)} مستخدم.'
+        ))
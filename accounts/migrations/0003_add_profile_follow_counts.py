@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_add_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE accounts_profile p
+                SET followers_count = (
+                        SELECT count(*) FROM accounts_follow WHERE following_id = p.user_id
+                    ),
+                    following_count = (
+                        SELECT count(*) FROM accounts_follow WHERE follower_id = p.user_id
+                    )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
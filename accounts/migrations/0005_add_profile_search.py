@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:12
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+from accounts.search import build_search_text
+
+
+def fill_search_text(apps, schema_editor):
+    Profile = apps.get_model('accounts', 'Profile')
+    profiles = Profile.objects.select_related('user').order_by('pk')
+    batch = []
+    for profile in profiles.iterator(chunk_size=1000):
+        profile.search_text = build_search_text(profile.user, profile.bio)
+        batch.append(profile)
+        if len(batch) == 1000:
+            Profile.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    Profile.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_add_follow_suggestions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # pg_trgm extension
+        ('posts', '0003_add_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_text',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='profile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_text', name='gin_trgm_ops'), name='profile_search_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['-followers_count', '-id'], name='profile_popular_idx'),
+        ),
+    ]
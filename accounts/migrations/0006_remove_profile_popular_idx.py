@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_add_profile_search'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='profile',
+            name='profile_popular_idx',
+        ),
+    ]
@@ -2,37 +2,129 @@
 Models for user accounts, profiles, and follow relationships.
 """
 
-from django.db import models
+from django.db import connection, models
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
+from miftah.models import DirtyFieldsMixin
+from .search import build_search_text
 
-class Profile(models.Model):
+
+class Profile(DirtyFieldsMixin):
     """
     Extended user profile.
     Each User has one Profile created automatically.
     """
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(max_length=500, blank=True, verbose_name='نبذة عني')
+    # Denormalized counters, kept in sync by FollowManager.toggle and the
+    # Follow signals below. Never assigned in Python, so save() leaves them
+    # alone (see DirtyFieldsMixin).
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+    # Moves whenever the user follows or unfollows someone, with
+    # following_count; part of their following feed's ETag (see
+    # posts.versioning)
+    follows_version = models.PositiveIntegerField(default=0, editable=False)
+    # Normalized username, name and bio for user search (see accounts.search)
+    search_text = models.TextField(blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = 'الملف الشخصي'
         verbose_name_plural = 'الملفات الشخصية'
+        indexes = [
+            # User search (search_text__contains)
+            GinIndex(OpClass('search_text', name='gin_trgm_ops'), name='profile_search_trgm'),
+        ]
 
     def __str__(self):
         return f'ملف {self.user.username}'
 
-    @property
-    def followers_count(self):
-        """Number of users following this user."""
-        return self.user.followers.count()
+    def save(self, *args, **kwargs):
+        self.search_text = build_search_text(self.user, self.bio)
+        super().save(*args, **kwargs)
+
+
+class FollowManager(models.Manager):
+    """Manager with an atomic follow toggle and batched follow-state lookups."""
+
+    # One statement that either removes the follow or adds it, moves both
+    # profiles' counters by the net change, and reads the reverse follow.
+    # A concurrent duplicate follow (double click) waits on the unique
+    # constraint and then changes nothing, instead of raising.
+    TOGGLE_SQL = """
+        WITH removed AS (
+            DELETE FROM accounts_follow
+            WHERE follower_id = %(follower_id)s AND following_id = %(following_id)s
+            RETURNING 1
+        ),
+        added AS (
+            INSERT INTO accounts_follow (follower_id, following_id, created_at)
+            SELECT %(follower_id)s, %(following_id)s, %(now)s
+            WHERE NOT EXISTS (SELECT 1 FROM removed)
+            ON CONFLICT (follower_id, following_id) DO NOTHING
+            RETURNING 1
+        ),
+        delta AS (
+            SELECT (SELECT count(*) FROM added) - (SELECT count(*) FROM removed) AS change
+        ),
+        following_counts AS (
+            UPDATE accounts_profile SET
+                following_count = following_count + delta.change,
+                follows_version = follows_version + 1
+            FROM delta
+            WHERE user_id = %(follower_id)s AND delta.change <> 0
+        ),
+        followers_counts AS (
+            UPDATE accounts_profile SET followers_count = followers_count + delta.change
+            FROM delta
+            WHERE user_id = %(following_id)s AND delta.change <> 0
+        )
+        SELECT
+            NOT EXISTS (SELECT 1 FROM removed),
+            EXISTS (
+                SELECT 1 FROM accounts_follow
+                WHERE follower_id = %(following_id)s AND following_id = %(follower_id)s
+            )
+    """
+
+    def toggle(self, follower_id, following_id):
+        """
+        Follow or unfollow a user.
+        Returns (is_following, follows_me) after the toggle.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(self.TOGGLE_SQL, {
+                'follower_id': follower_id,
+                'following_id': following_id,
+                'now': timezone.now(),
+            })
+            is_following, follows_me = cursor.fetchone()
+        return is_following, follows_me
+
+    def states_for(self, viewer_id, user_ids):
+        """
+        Follow state between the viewer and each of user_ids, in one query.
+        Returns {user_id: (is_following, follows_me)}.
+        """
+        states = {user_id: (False, False) for user_id in user_ids}
+        pairs = self.filter(
+            models.Q(follower_id=viewer_id, following_id__in=user_ids) |
+            models.Q(follower_id__in=user_ids, following_id=viewer_id)
+        ).values_list('follower_id', 'following_id')
 
-    @property
-    def following_count(self):
-        """Number of users this user follows."""
-        return self.user.following.count()
+        for follower_id, following_id in pairs:
+            if follower_id == viewer_id:
+                is_following, follows_me = states[following_id]
+                states[following_id] = (True, follows_me)
+            else:
+                is_following, follows_me = states[follower_id]
+                states[follower_id] = (is_following, True)
+        return states
 
 
 class Follow(models.Model):
@@ -54,10 +146,17 @@ class Follow(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = FollowManager()
+
     class Meta:
         verbose_name = 'متابعة'
         verbose_name_plural = 'المتابعات'
         unique_together = ('follower', 'following')
+        indexes = [
+            # Following / followers lists, newest first
+            models.Index(fields=['follower', '-created_at'], name='follow_follower_recent_idx'),
+            models.Index(fields=['following', '-created_at'], name='follow_following_recent_idx'),
+        ]
         constraints = [
             models.CheckConstraint(
                 check=~models.Q(follower=models.F('following')),
@@ -69,6 +168,39 @@ class Follow(models.Model):
         return f'{self.follower.username} يتابع {self.following.username}'
 
 
+class FollowSuggestion(models.Model):
+    """
+    Precomputed "who to follow" entry for a user.
+    Rebuilt periodically by the refresh_suggestions command.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Users the user follows who follow suggested
+    mutual_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField()
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'اقتراح متابعة'
+        verbose_name_plural = 'اقتراحات المتابعة'
+        unique_together = ('user', 'suggested')
+        indexes = [
+            # Sidebar: a user's best suggestions
+            models.Index(fields=['user', '-score'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'اقتراح {self.suggested.username} لـ {self.user.username}'
+
+
 # Signal to create Profile automatically when User is created
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -78,7 +210,39 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save the Profile when User is saved."""
+def save_user_profile(sender, instance, created, update_fields, **kwargs):
+    """Refresh the Profile's search text when the User's names change."""
+    if created:
+        return
+    # e.g. login only updates last_login
+    if update_fields is not None and not {'username', 'first_name', 'last_name'} & set(update_fields):
+        return
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+# Signals to keep the Profile follow counters in sync with ORM writes
+# (FollowManager.toggle updates them itself)
+@receiver(post_save, sender=Follow)
+def increment_follow_counts(sender, instance, created, **kwargs):
+    """Count a new follow on both profiles."""
+    if created:
+        Profile.objects.filter(user_id=instance.follower_id).update(
+            following_count=models.F('following_count') + 1,
+            follows_version=models.F('follows_version') + 1
+        )
+        Profile.objects.filter(user_id=instance.following_id).update(
+            followers_count=models.F('followers_count') + 1
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_follow_counts(sender, instance, **kwargs):
+    """Uncount a removed follow (unfollow, or a cascade from a deleted user)."""
+    Profile.objects.filter(user_id=instance.follower_id).update(
+        following_count=models.F('following_count') - 1,
+        follows_version=models.F('follows_version') + 1
+    )
+    Profile.objects.filter(user_id=instance.following_id).update(
+        followers_count=models.F('followers_count') - 1
+    )
@@ -0,0 +1,40 @@
+"""
+User search.
+
+Profiles keep a normalized copy of the username, name and bio in
+Profile.search_text, indexed with trigrams, so a search is a single
+indexed substring match. Normalization lowercases the text and folds the
+Arabic spelling variants people type interchangeably (hamza forms of
+alef, taa marbuta, alef maqsura) and strips diacritics and tatweel, so
+"احمد" finds "أحمد".
+"""
+
+import re
+
+# Tashkeel, superscript alef, Quranic marks and tatweel
+ARABIC_MARKS = re.compile('[\u064B-\u065F\u0670\u06D6-\u06ED\u0640]')
+
+ARABIC_LETTERS = str.maketrans({
+    'أ': 'ا',
+    'إ': 'ا',
+    'آ': 'ا',
+    'ٱ': 'ا',
+    'ى': 'ي',
+    'ئ': 'ي',
+    'ؤ': 'و',
+    'ة': 'ه',
+})
+
+# Shorter queries match too many profiles for the index to help
+MIN_QUERY_LENGTH = 2
+
+
+def normalize_search_text(text):
+    """Lowercase, strip Arabic diacritics, fold letter variants and collapse whitespace."""
+    text = ARABIC_MARKS.sub('', text.lower()).translate(ARABIC_LETTERS)
+    return ' '.join(text.split())
+
+
+def build_search_text(user, bio):
+    """Normalized searchable text of a user's profile."""
+    return normalize_search_text(' '.join([user.username, user.first_name, user.last_name, bio]))
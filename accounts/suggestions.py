@@ -0,0 +1,130 @@
+"""
+"Who to follow" suggestions.
+
+Candidates are the accounts followed by the people a user follows
+(friends of friends), scored by how many of those people follow them,
+how many tags they share with the user, and how much they have posted
+lately. Walking the follow graph is too expensive per request, so a
+batch job stores each active user's top suggestions in FollowSuggestion
+and the sidebars only read that table.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import FollowSuggestion
+
+SUGGESTIONS_PER_USER = 20
+# Users who logged in or joined this recently get suggestions
+ACTIVE_USER_WINDOW = timedelta(days=30)
+# Posts and reactions this recent count towards a user's tags
+TAG_WINDOW = timedelta(days=90)
+# Posts this recent count as a candidate's activity
+ACTIVITY_WINDOW = timedelta(days=14)
+
+MUTUAL_WEIGHT = 1.0
+SHARED_TAG_WEIGHT = 0.5
+ACTIVITY_WEIGHT = 0.5
+
+# Score every friend-of-friend candidate of a batch of users and insert
+# the top SUGGESTIONS_PER_USER for each one
+REFRESH_SQL = """
+    WITH candidates AS (
+        SELECT f1.follower_id AS user_id, f2.following_id AS suggested_id,
+               count(*) AS mutual_count
+        FROM accounts_follow f1
+        JOIN accounts_follow f2 ON f2.follower_id = f1.following_id
+        WHERE f1.follower_id = ANY(%(user_ids)s)
+          AND f2.following_id <> f1.follower_id
+          AND NOT EXISTS (
+              SELECT 1 FROM accounts_follow f3
+              WHERE f3.follower_id = f1.follower_id AND f3.following_id = f2.following_id
+          )
+        GROUP BY f1.follower_id, f2.following_id
+    ),
+    user_tags AS (
+        -- Tags of the posts each user wrote or reacted to
+        SELECT author_id AS user_id, unnest(tag_ids) AS tag_id
+        FROM posts_post
+        WHERE author_id = ANY(%(user_ids)s)
+          AND deleted_at IS NULL AND created_at >= %(tags_since)s
+        UNION
+        SELECT r.user_id, unnest(p.tag_ids)
+        FROM posts_reaction r
+        JOIN posts_post p ON p.id = r.post_id
+        WHERE r.user_id = ANY(%(user_ids)s)
+          AND p.deleted_at IS NULL AND r.created_at >= %(tags_since)s
+    ),
+    candidate_tags AS (
+        -- Tags of the posts each candidate wrote
+        SELECT DISTINCT author_id AS suggested_id, unnest(tag_ids) AS tag_id
+        FROM posts_post
+        WHERE author_id IN (SELECT suggested_id FROM candidates)
+          AND deleted_at IS NULL AND created_at >= %(tags_since)s
+    ),
+    shared_tags AS (
+        SELECT c.user_id, c.suggested_id, count(*) AS shared_count
+        FROM candidates c
+        JOIN user_tags u ON u.user_id = c.user_id
+        JOIN candidate_tags t ON t.suggested_id = c.suggested_id AND t.tag_id = u.tag_id
+        GROUP BY c.user_id, c.suggested_id
+    ),
+    activity AS (
+        SELECT author_id AS suggested_id, count(*) AS post_count
+        FROM posts_post
+        WHERE author_id IN (SELECT suggested_id FROM candidates)
+          AND deleted_at IS NULL AND created_at >= %(activity_since)s
+        GROUP BY author_id
+    ),
+    ranked AS (
+        SELECT user_id, suggested_id, mutual_count, score,
+               row_number() OVER (PARTITION BY user_id ORDER BY score DESC, suggested_id) AS rank
+        FROM (
+            SELECT c.user_id, c.suggested_id, c.mutual_count,
+                   c.mutual_count * %(mutual_weight)s
+                   + coalesce(s.shared_count, 0) * %(tag_weight)s
+                   + ln(1 + coalesce(a.post_count, 0)) * %(activity_weight)s AS score
+            FROM candidates c
+            LEFT JOIN shared_tags s
+                ON s.user_id = c.user_id AND s.suggested_id = c.suggested_id
+            LEFT JOIN activity a ON a.suggested_id = c.suggested_id
+        ) scored
+    )
+    INSERT INTO accounts_followsuggestion (user_id, suggested_id, mutual_count, score, created_at)
+    SELECT user_id, suggested_id, mutual_count, score, %(now)s
+    FROM ranked
+    WHERE rank <= %(limit)s
+"""
+
+
+def active_user_ids(now):
+    """Ids of the users who get suggestions, in id order."""
+    since = now - ACTIVE_USER_WINDOW
+    return list(User.objects.filter(
+        Q(last_login__gte=since) | Q(date_joined__gte=since),
+        is_active=True
+    ).order_by('pk').values_list('pk', flat=True))
+
+
+def refresh_suggestions(user_ids, now):
+    """
+    Replace the suggestions of user_ids with freshly scored ones.
+    Returns the number of suggestions stored.
+    """
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(REFRESH_SQL, {
+                'user_ids': list(user_ids),
+                'tags_since': now - TAG_WINDOW,
+                'activity_since': now - ACTIVITY_WINDOW,
+                'mutual_weight': MUTUAL_WEIGHT,
+                'tag_weight': SHARED_TAG_WEIGHT,
+                'activity_weight': ACTIVITY_WEIGHT,
+                'now': now,
+                'limit': SUGGESTIONS_PER_USER,
+            })
+            return cursor.rowcount
@@ -0,0 +1,69 @@
+"""
+Tests for profiles, follows and user search.
+"""
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import Follow
+
+
+class FollowCountTests(TestCase):
+    """Profile follow counters follow the Follow rows."""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user('viewer', password='pass')
+        self.author = User.objects.create_user('author', password='pass')
+        self.client.force_login(self.viewer)
+
+    def counts(self, user):
+        user.profile.refresh_from_db()
+        return user.profile.followers_count, user.profile.following_count
+
+    def test_toggle_follow_updates_counters(self):
+        url = reverse('accounts:toggle_follow', args=[self.author.username])
+        with self.assertNumQueries(3):  # user, target user and the toggle
+            response = self.client.post(url)
+        self.assertContains(response, 'متابَع')
+        self.assertEqual(self.counts(self.author), (1, 0))
+        self.assertEqual(self.counts(self.viewer), (0, 1))
+
+        # A stale copy of the profile doesn't overwrite the counters
+        self.author.save()
+        self.assertEqual(self.counts(self.author), (1, 0))
+
+        self.client.post(url)
+        self.assertEqual(self.counts(self.author), (0, 0))
+        self.assertEqual(self.counts(self.viewer), (0, 0))
+
+
+class UserSearchTests(TestCase):
+    """User search folds Arabic spelling variants and pages on a stable key."""
+
+    def test_search_normalizes_arabic(self):
+        viewer = User.objects.create_user('viewer', password='pass')
+        User.objects.create_user('ahmad', password='pass', first_name='أحمد')
+        self.client.force_login(viewer)
+
+        # user, matching profiles and their follow states (the session is cached)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('accounts:search'), {'q': 'احمد'})
+        self.assertContains(response, 'ahmad')
+
+    def test_pages_stay_stable_when_follower_counts_change(self):
+        viewer = User.objects.create_user('viewer', password='pass')
+        users = [User.objects.create_user(f'student{i}', password='pass') for i in range(30)]
+        self.client.force_login(viewer)
+        url = reverse('accounts:search')
+
+        first = self.client.get(url, {'q': 'student'}).context
+        # A user on the second page becomes the most followed meanwhile
+        Follow.objects.create(follower=viewer, following=users[0])
+        second = self.client.get(url, {'q': 'student', 'after': first['next_cursor']}).context
+
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(
+            sorted(user.pk for user in [*first['users'], *second['users']]),
+            sorted(user.pk for user in users)
+        )
@@ -13,6 +13,8 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/edit/', views.edit_profile_view, name='edit_profile'),
     path('following/', views.following_list, name='following_list'),
+    path('search/', views.search_users, name='search'),
+    path('suggestions/', views.follow_suggestions, name='suggestions'),
     path('u/<str:username>/', views.profile_view, name='profile'),
     path('u/<str:username>/followers/', views.followers_list, name='followers_list'),
     path('u/<str:username>/toggle-follow/', views.toggle_follow, name='toggle_follow'),
@@ -11,7 +11,15 @@ from django.http import HttpResponse
 from django.views.decorators.http import require_POST
 
 from .forms import SignUpForm, LoginForm, ProfileForm, UserUpdateForm
-from .models import Follow
+from .models import Follow, FollowSuggestion, Profile
+from .search import MIN_QUERY_LENGTH, normalize_search_text
+from miftah.pagination import paginate_by_cursor
+from miftah.replicas import replica_reads
+from posts.versioning import bump_posts_version
+
+FOLLOW_LIST_PAGE_SIZE = 30
+SUGGESTIONS_SHOWN = 5
+USER_SEARCH_PAGE_SIZE = 20
 
 
 def signup_view(request):
@@ -61,9 +69,10 @@ def logout_view(request):
 
 
 @login_required
+@replica_reads
 def profile_view(request, username):
     """View a user's profile."""
-    profile_user = get_object_or_404(User, username=username)
+    profile_user = get_object_or_404(User, username=username, is_active=True)
     is_own_profile = request.user == profile_user
 
     # Get follow status
@@ -71,21 +80,16 @@ def profile_view(request, username):
     follows_me = False
 
     if not is_own_profile:
-        is_following = Follow.objects.filter(
-            follower=request.user,
-            following=profile_user
-        ).exists()
-        follows_me = Follow.objects.filter(
-            follower=profile_user,
-            following=request.user
-        ).exists()
+        is_following, follows_me = Follow.objects.states_for(
+            request.user.pk, [profile_user.pk]
+        )[profile_user.pk]
 
     # Get user's posts (non-deleted)
     from posts.models import Post
     posts = Post.objects.filter(
         author=profile_user,
         deleted_at__isnull=True
-    ).order_by('-created_at')
+    ).select_related('author', 'study_set').order_by('-created_at')
 
     context = {
         'profile_user': profile_user,
@@ -108,6 +112,9 @@ def edit_profile_view(request):
         if user_form.is_valid() and profile_form.is_valid():
             user_form.save()
             profile_form.save()
+            if 'username' in user_form.changed_data:
+                # Post cards show the author's username
+                bump_posts_version()
             messages.success(request, 'تم تحديث ملفك الشخصي بنجاح.')
             return redirect('accounts:profile', username=request.user.username)
     else:
@@ -129,31 +136,7 @@ def toggle_follow(request, username):
     if target_user == request.user:
         return HttpResponse('لا يمكنك متابعة نفسك', status=400)
 
-    follow_exists = Follow.objects.filter(
-        follower=request.user,
-        following=target_user
-    ).exists()
-
-    if follow_exists:
-        # Unfollow
-        Follow.objects.filter(
-            follower=request.user,
-            following=target_user
-        ).delete()
-        is_following = False
-    else:
-        # Follow
-        Follow.objects.create(
-            follower=request.user,
-            following=target_user
-        )
-        is_following = True
-
-    # Check if they follow me (for follow back button)
-    follows_me = Follow.objects.filter(
-        follower=target_user,
-        following=request.user
-    ).exists()
+    is_following, follows_me = Follow.objects.toggle(request.user.pk, target_user.pk)
 
     # Return updated button HTML for HTMX
     return render(request, 'accounts/partials/follow_button.html', {
@@ -163,27 +146,91 @@ def toggle_follow(request, username):
     })
 
 
+def render_user_list(request, template_name, users, next_cursor, context):
+    """
+    Render a page of a user list, with the viewer's follow state for every
+    listed user resolved in one query. "Load more" requests get just the
+    next page of items.
+    """
+    states = Follow.objects.states_for(request.user.pk, [user.pk for user in users])
+    for user in users:
+        user.is_following, user.follows_me = states[user.pk]
+
+    context.update({'users': users, 'next_cursor': next_cursor})
+    if request.headers.get('HX-Request'):
+        template_name = 'accounts/partials/user_list.html'
+    return render(request, template_name, context)
+
+
+def render_follow_list(request, template_name, follows, user_field, context):
+    """Render a page of a following/followers list (see render_user_list)."""
+    follows, next_cursor = paginate_by_cursor(
+        follows, request.GET.get('after'), FOLLOW_LIST_PAGE_SIZE
+    )
+    users = [getattr(follow, user_field) for follow in follows]
+    return render_user_list(request, template_name, users, next_cursor, context)
+
+
 @login_required
+@replica_reads
 def following_list(request):
     """Show list of users the current user follows."""
     following = Follow.objects.filter(
         follower=request.user
-    ).select_related('following', 'following__profile').order_by('-created_at')
+    ).select_related('following', 'following__profile')
 
-    return render(request, 'accounts/following_list.html', {
-        'following': following,
-    })
+    return render_follow_list(request, 'accounts/following_list.html', following, 'following', {})
 
 
 @login_required
+@replica_reads
 def followers_list(request, username):
     """Show list of users following a specific user."""
     profile_user = get_object_or_404(User, username=username)
     followers = Follow.objects.filter(
         following=profile_user
-    ).select_related('follower', 'follower__profile').order_by('-created_at')
+    ).select_related('follower', 'follower__profile')
 
-    return render(request, 'accounts/followers_list.html', {
+    return render_follow_list(request, 'accounts/followers_list.html', followers, 'follower', {
         'profile_user': profile_user,
-        'followers': followers,
+    })
+
+
+@login_required
+@replica_reads
+def search_users(request):
+    """Search users by username, name and bio, newest accounts first."""
+    query = request.GET.get('q', '').strip()
+    terms = normalize_search_text(query).split()
+
+    profiles, next_cursor = [], None
+    if terms and len(''.join(terms)) >= MIN_QUERY_LENGTH:
+        matches = Profile.objects.filter(user__is_active=True).select_related('user')
+        for term in terms:
+            matches = matches.filter(search_text__contains=term)
+        # Paged on the id: a follower count can change between two pages,
+        # which would skip or repeat users
+        profiles, next_cursor = paginate_by_cursor(
+            matches, request.GET.get('after'), USER_SEARCH_PAGE_SIZE, field='id'
+        )
+
+    return render_user_list(
+        request, 'accounts/user_search.html',
+        [profile.user for profile in profiles], next_cursor, {'query': query}
+    )
+
+
+@login_required
+@replica_reads
+def follow_suggestions(request):
+    """'Who to follow' sidebar (see accounts.suggestions). Returns HTMX partial."""
+    suggestions = FollowSuggestion.objects.filter(
+        user=request.user
+    ).exclude(
+        # Followed since the suggestions were computed
+        suggested__followers__follower=request.user
+    ).select_related('suggested', 'suggested__profile').order_by('-score')[:SUGGESTIONS_SHOWN]
+
+    return render(request, 'accounts/partials/suggestions.html', {
+        'suggestions': suggestions,
     })
@@ -0,0 +1,248 @@
+"""
+Deleting study sets and users in the background.
+
+A plain delete() makes Django's collector load every related row
+(flashcards, questions, posts, reactions, comments...) into Python and
+delete them in one long transaction. Instead, deleting hides the object
+at once (soft-deleting it and its posts) and queues a DeletionJob. The
+purge_deleted command then works through a fixed list of steps, each
+deleting at most batch_size rows per transaction with a single SQL
+statement, and records its progress on the job. Steps are idempotent, so
+an interrupted job simply resumes. Once the children are gone, the
+object itself is deleted with the ORM, which now has little left to do.
+"""
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import FollowSuggestion
+from posts.models import Post, Comment, soft_delete_posts, soft_delete_comments
+from posts.versioning import bump_posts_version
+from study.models import StudySet
+from .models import DeletionJob
+from .stats import invalidate_dashboard_stats
+
+# Delete up to %(limit)s rows of table matching where; returns the count
+DELETE_BATCH_SQL = """
+    WITH removed AS (
+        DELETE FROM {table}
+        WHERE id IN (SELECT id FROM {table} WHERE {where} LIMIT %(limit)s)
+        RETURNING 1
+    )
+    SELECT count(*) FROM removed
+"""
+
+# Follows of a deleted user, moving the other side's counters
+DELETE_FOLLOWS_SQL = """
+    WITH removed AS (
+        DELETE FROM accounts_follow
+        WHERE id IN (
+            SELECT id FROM accounts_follow
+            WHERE follower_id = %(id)s OR following_id = %(id)s
+            LIMIT %(limit)s
+        )
+        RETURNING follower_id, following_id
+    ),
+    counts AS (
+        -- One UPDATE per profile: a row can't be updated twice in a statement
+        UPDATE accounts_profile p SET
+            followers_count = followers_count - r.followers,
+            following_count = following_count - r.following,
+            follows_version = follows_version + sign(r.following)
+        FROM (
+            SELECT user_id, sum(followers) AS followers, sum(following) AS following
+            FROM (
+                SELECT following_id AS user_id, 1 AS followers, 0 AS following FROM removed
+                UNION ALL
+                SELECT follower_id, 0, 1 FROM removed
+            ) sides
+            GROUP BY user_id
+        ) r
+        WHERE p.user_id = r.user_id
+    )
+    SELECT count(*) FROM removed
+"""
+
+# Reactions of a deleted user, moving the posts' counters
+DELETE_REACTIONS_SQL = """
+    WITH removed AS (
+        DELETE FROM posts_reaction
+        WHERE id IN (
+            SELECT id FROM posts_reaction WHERE user_id = %(id)s LIMIT %(limit)s
+        )
+        RETURNING post_id, value
+    ),
+    counts AS (
+        UPDATE posts_post p SET
+            likes_count = likes_count - r.likes,
+            dislikes_count = dislikes_count - r.dislikes,
+            version = version + 1
+        FROM (
+            SELECT post_id,
+                   count(*) FILTER (WHERE value = 'like') AS likes,
+                   count(*) FILTER (WHERE value = 'dislike') AS dislikes
+            FROM removed
+            GROUP BY post_id
+        ) r
+        WHERE p.id = r.post_id
+    )
+    SELECT count(*) FROM removed
+"""
+
+CLEAR_REVIEWER_SQL = """
+    WITH cleared AS (
+        UPDATE admin_panel_report SET reviewed_by_id = NULL
+        WHERE id IN (
+            SELECT id FROM admin_panel_report WHERE reviewed_by_id = %(id)s LIMIT %(limit)s
+        )
+        RETURNING 1
+    )
+    SELECT count(*) FROM cleared
+"""
+
+
+def _delete_batch(table, where):
+    return DELETE_BATCH_SQL.format(table=table, where=where)
+
+
+def _delete_reports(model, ids):
+    """Step deleting the reports on the rows of a posts model selected by ids."""
+    return _delete_batch('admin_panel_report', f"""
+        content_type_id = (
+            SELECT id FROM django_content_type WHERE app_label = 'posts' AND model = '{model}'
+        )
+        AND object_id IN ({ids})
+    """)
+
+
+def _content_steps(post_where, set_where):
+    """
+    Steps removing posts (with their children and the reports on them)
+    and study set contents.
+    """
+    post_ids = f'SELECT id FROM posts_post WHERE {post_where}'
+    posts = f'post_id IN ({post_ids})'
+    comment_ids = f'SELECT id FROM posts_comment WHERE {posts}'
+    sets = f'study_set_id IN (SELECT id FROM study_studyset WHERE {set_where})'
+    return [
+        ('بلاغات المنشورات', _delete_reports('post', post_ids)),
+        ('بلاغات تعليقات المنشورات', _delete_reports('comment', comment_ids)),
+        ('تفاعلات المنشورات', _delete_batch('posts_reaction', posts)),
+        ('تعليقات المنشورات', _delete_batch('posts_comment', posts)),
+        ('تصنيفات المنشورات', _delete_batch('posts_posttag', posts)),
+        ('المنشورات', _delete_batch('posts_post', post_where)),
+        ('البطاقات التعليمية', _delete_batch('study_flashcard', sets)),
+        ('أسئلة الاختبارات', _delete_batch('study_quizquestion', sets)),
+    ]
+
+
+# kind -> [(label, sql)], run in order before the final ORM delete
+STEPS = {
+    'study_set': _content_steps('study_set_id = %(id)s', 'id = %(id)s'),
+    'user': [
+        ('المتابعات', DELETE_FOLLOWS_SQL),
+        ('التفاعلات', DELETE_REACTIONS_SQL),
+        ('بلاغات التعليقات', _delete_reports(
+            'comment', 'SELECT id FROM posts_comment WHERE author_id = %(id)s'
+        )),
+        ('التعليقات', _delete_batch('posts_comment', 'author_id = %(id)s')),
+        ('البلاغات', _delete_batch('admin_panel_report', 'reporter_id = %(id)s')),
+        ('البلاغات المراجعة', CLEAR_REVIEWER_SQL),
+        ('بلاغات التعليقات المؤرشفة', _delete_reports(
+            'archivedcomment', 'SELECT id FROM posts_archivedcomment WHERE author_id = %(id)s'
+        )),
+        ('التعليقات المؤرشفة', _delete_batch('posts_archivedcomment', 'author_id = %(id)s')),
+        ('بلاغات المنشورات المؤرشفة', _delete_reports(
+            'archivedpost', 'SELECT id FROM posts_archivedpost WHERE author_id = %(id)s'
+        )),
+        ('المنشورات المؤرشفة', _delete_batch('posts_archivedpost', 'author_id = %(id)s')),
+        # Their posts, and other users' posts sharing their study sets
+        *_content_steps(
+            'author_id = %(id)s OR study_set_id IN '
+            '(SELECT id FROM study_studyset WHERE owner_id = %(id)s)',
+            'owner_id = %(id)s',
+        ),
+        ('المجموعات الدراسية', _delete_batch('study_studyset', 'owner_id = %(id)s')),
+    ],
+}
+
+MODELS = {
+    'study_set': StudySet,
+    'user': User,
+}
+
+
+def schedule_study_set_deletion(study_set):
+    """Hide a study set and its posts now; queue the purge of its rows."""
+    with transaction.atomic():
+        StudySet.objects.filter(pk=study_set.pk).update(deleted_at=timezone.now())
+        soft_delete_posts(study_set.posts.filter(
+            deleted_at__isnull=True
+        ).values_list('pk', flat=True))
+        return DeletionJob.objects.create(kind='study_set', object_id=study_set.pk)
+
+
+def schedule_user_deletion(user):
+    """
+    Deactivate a user and hide everything they wrote now; queue the purge
+    of their rows.
+    """
+    with transaction.atomic():
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        StudySet.objects.filter(owner=user, deleted_at__isnull=True).update(
+            deleted_at=timezone.now()
+        )
+        soft_delete_posts(Post.objects.filter(
+            Q(author=user) | Q(study_set__owner=user), deleted_at__isnull=True
+        ).values_list('pk', flat=True))
+        soft_delete_comments(Comment.objects.filter(
+            author=user, deleted_at__isnull=True
+        ).values_list('pk', flat=True))
+        FollowSuggestion.objects.filter(suggested=user).delete()
+        return DeletionJob.objects.create(kind='user', object_id=user.pk)
+
+
+def purge_batch(job_id, batch_size):
+    """
+    Run one batch of a pending job. Returns True if the job has more
+    work left, False once it's done (or being run by another worker).
+    """
+    with transaction.atomic():
+        job = DeletionJob.objects.select_for_update(skip_locked=True).filter(
+            pk=job_id, status='pending'
+        ).first()
+        if job is None:
+            return False
+
+        steps = STEPS[job.kind]
+        if job.step < len(steps):
+            with connection.cursor() as cursor:
+                cursor.execute(steps[job.step][1], {'id': job.object_id, 'limit': batch_size})
+                deleted = cursor.fetchone()[0]
+            job.rows_deleted += deleted
+            if deleted < batch_size:
+                job.step += 1
+            if deleted:
+                # Counters and cards of other users' posts may have changed,
+                # and so may the dashboard counts
+                bump_posts_version()
+                invalidate_dashboard_stats()
+        else:
+            MODELS[job.kind].objects.filter(pk=job.object_id).delete()
+            job.status = 'done'
+            job.finished_at = timezone.now()
+
+        job.save(update_fields=['step', 'rows_deleted', 'status', 'finished_at', 'updated_at'])
+        return job.status == 'pending'
+
+
+def get_step_label(job):
+    """Human-readable name of the step a job is on."""
+    steps = STEPS[job.kind]
+    if job.status == 'done':
+        return 'مكتمل'
+    if job.step < len(steps):
+        return steps[job.step][0]
+    return 'الحذف النهائي'
@@ -0,0 +1,29 @@
+"""
+Management command to delete a user account.
+The user is deactivated and their content hidden at once; the rows are
+purged later by purge_deleted (see admin_panel.deletion).
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.deletion import schedule_user_deletion
+
+
+class Command(BaseCommand):
+    help = 'Deactivates a user, hides their content and queues the purge of their data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('المستخدم غير موجود.')
+
+        job = schedule_user_deletion(user)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم إخفاء {user.username}. مهمة الحذف رقم {job.pk} في الانتظار.')
+        )
@@ -0,0 +1,57 @@
+"""
+Management command to purge deleted study sets and users in batches
+(see admin_panel.deletion).
+Meant to run periodically (e.g. every minute from cron); safe to
+interrupt and re-run, and several copies can run side by side.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from admin_panel.deletion import get_step_label, purge_batch
+from admin_panel.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = 'Purges the rows of deleted study sets and users, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows to delete per transaction',
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=int,
+            default=0,
+            help='Stop after this many seconds (0 = run until the queue is empty)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+
+        job_ids = list(DeletionJob.objects.filter(
+            status='pending'
+        ).order_by('created_at').values_list('pk', flat=True))
+
+        done_count = 0
+        for job_id in job_ids:
+            while purge_batch(job_id, batch_size):
+                if deadline and time.monotonic() > deadline:
+                    job = DeletionJob.objects.get(pk=job_id)
+                    self.stdout.write(
+                        f'توقف عند {job}: {get_step_label(job)}، {job.rows_deleted} صف محذوف.'
+                    )
+                    return
+            job = DeletionJob.objects.get(pk=job_id)
+            if job.status == 'done':
+                done_count += 1
+                self.stdout.write(f'{job}: {job.rows_deleted} صف محذوف.')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم إكمال {done_count} مهمة حذف.')
+        )
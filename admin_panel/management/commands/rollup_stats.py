@@ -0,0 +1,40 @@
+"""
+Management command to update the daily activity rollups.
+Meant to run periodically (e.g. hourly from cron); each run only
+recounts days since the last run, and re-running is harmless.
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.rollups import get_rollup_start, rollup_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Updates daily statistics (users, posts, comments, reactions, reports, generations, tags)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Recount from this day (YYYY-MM-DD) instead of the last rolled-up day',
+        )
+
+    def handle(self, *args, **options):
+        if options['since']:
+            try:
+                start = date.fromisoformat(options['since'])
+            except ValueError:
+                raise CommandError('صيغة التاريخ غير صحيحة. استخدم YYYY-MM-DD.')
+        else:
+            start = get_rollup_start()
+
+        if start is None:
+            self.stdout.write('لا توجد بيانات بعد.')
+            return
+
+        days_count = rollup_daily_stats(start)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تحديث إحصائيات {days_count} يوم.')
+        )
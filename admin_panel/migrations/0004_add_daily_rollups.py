@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_add_report_recent_index'),
+        ('posts', '0011_add_post_created_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='اليوم')),
+                ('new_users', models.PositiveIntegerField(default=0, verbose_name='مستخدمون جدد')),
+                ('new_posts', models.PositiveIntegerField(default=0, verbose_name='منشورات جديدة')),
+                ('new_comments', models.PositiveIntegerField(default=0, verbose_name='تعليقات جديدة')),
+                ('new_reactions', models.PositiveIntegerField(default=0, verbose_name='تفاعلات جديدة')),
+                ('new_reports', models.PositiveIntegerField(default=0, verbose_name='بلاغات جديدة')),
+                ('new_generations', models.PositiveIntegerField(default=0, verbose_name='مجموعات دراسية جديدة')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'إحصائية يومية',
+                'verbose_name_plural': 'الإحصائيات اليومية',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTagStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='اليوم')),
+                ('new_posts', models.PositiveIntegerField(default=0, verbose_name='منشورات جديدة')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='posts.tag', verbose_name='التصنيف')),
+            ],
+            options={
+                'verbose_name': 'إحصائية تصنيف يومية',
+                'verbose_name_plural': 'إحصائيات التصنيفات اليومية',
+                'ordering': ['date'],
+                'unique_together': {('date', 'tag')},
+            },
+        ),
+        # New users per day; auth_user isn't ours to add Meta.indexes to
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS auth_user_date_joined_idx ON auth_user (date_joined)',
+            reverse_sql='DROP INDEX IF EXISTS auth_user_date_joined_idx',
+        ),
+    ]
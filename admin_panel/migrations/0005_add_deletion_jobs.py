@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0004_add_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('study_set', 'مجموعة دراسية'), ('user', 'مستخدم')], max_length=20, verbose_name='النوع')),
+                ('object_id', models.BigIntegerField(verbose_name='معرف العنصر')),
+                ('status', models.CharField(choices=[('pending', 'قيد التنفيذ'), ('done', 'مكتمل')], default='pending', max_length=20, verbose_name='الحالة')),
+                ('step', models.PositiveSmallIntegerField(default=0)),
+                ('rows_deleted', models.PositiveIntegerField(default=0, verbose_name='الصفوف المحذوفة')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'مهمة حذف',
+                'verbose_name_plural': 'مهام الحذف',
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='deletionjob_pending_idx')],
+            },
+        ),
+    ]
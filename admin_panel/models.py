@@ -7,8 +7,22 @@ from django.contrib.auth.models import User
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 
+from miftah.models import DirtyFieldsMixin
+from posts.models import Tag
 
-class Report(models.Model):
+
+def get_content_preview(obj):
+    """Get a short preview of a reported post or comment."""
+    if obj is None:
+        return "محتوى محذوف"
+    if hasattr(obj, 'title'):
+        return obj.title[:50]
+    if hasattr(obj, 'body'):
+        return obj.body[:50]
+    return str(obj)[:50]
+
+
+class Report(DirtyFieldsMixin):
     """
     Report submitted by users against inappropriate content.
     Uses GenericForeignKey to support reporting both Posts and Comments.
@@ -86,6 +100,14 @@ class Report(models.Model):
         ordering = ['-created_at']
         # Prevent duplicate reports from same user on same content
         unique_together = ('reporter', 'content_type', 'object_id')
+        indexes = [
+            # Reports queue filtered by status, newest first
+            models.Index(fields=['status', '-created_at'], name='report_status_recent_idx'),
+            # Reports list across all statuses, newest first
+            models.Index(fields=['-created_at'], name='report_recent_idx'),
+            # All reports on a given post or comment
+            models.Index(fields=['content_type', 'object_id'], name='report_content_idx'),
+        ]
 
     def __str__(self):
         return f'بلاغ #{self.pk} - {self.get_reason_display()}'
@@ -96,14 +118,7 @@ class Report(models.Model):
 
     def get_reported_content_preview(self):
         """Get a preview of the reported content."""
-        obj = self.content_object
-        if obj is None:
-            return "محتوى محذوف"
-        if hasattr(obj, 'title'):
-            return obj.title[:50]
-        if hasattr(obj, 'body'):
-            return obj.body[:50]
-        return str(obj)[:50]
+        return get_content_preview(self.content_object)
 
     def get_content_type_display_ar(self):
         """Get Arabic display name for content type."""
@@ -111,4 +126,99 @@ class Report(models.Model):
             return 'منشور'
         elif self.content_type.model == 'comment':
             return 'تعليق'
+        elif self.content_type.model == 'archivedpost':
+            return 'منشور (مؤرشف)'
+        elif self.content_type.model == 'archivedcomment':
+            return 'تعليق (مؤرشف)'
         return self.content_type.model
+
+
+class DailyStat(models.Model):
+    """
+    Site activity for one day (in TIME_ZONE).
+    Filled by the rollup_stats command (see admin_panel.rollups).
+    """
+    date = models.DateField(unique=True, verbose_name='اليوم')
+    new_users = models.PositiveIntegerField(default=0, verbose_name='مستخدمون جدد')
+    new_posts = models.PositiveIntegerField(default=0, verbose_name='منشورات جديدة')
+    new_comments = models.PositiveIntegerField(default=0, verbose_name='تعليقات جديدة')
+    new_reactions = models.PositiveIntegerField(default=0, verbose_name='تفاعلات جديدة')
+    new_reports = models.PositiveIntegerField(default=0, verbose_name='بلاغات جديدة')
+    new_generations = models.PositiveIntegerField(default=0, verbose_name='مجموعات دراسية جديدة')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'إحصائية يومية'
+        verbose_name_plural = 'الإحصائيات اليومية'
+        ordering = ['date']
+
+    def __str__(self):
+        return f'إحصائيات {self.date}'
+
+
+class DailyTagStat(models.Model):
+    """New posts per tag for one day. Filled alongside DailyStat."""
+    date = models.DateField(verbose_name='اليوم')
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='daily_stats',
+        verbose_name='التصنيف'
+    )
+    new_posts = models.PositiveIntegerField(default=0, verbose_name='منشورات جديدة')
+
+    class Meta:
+        verbose_name = 'إحصائية تصنيف يومية'
+        verbose_name_plural = 'إحصائيات التصنيفات اليومية'
+        ordering = ['date']
+        unique_together = ('date', 'tag')
+
+    def __str__(self):
+        return f'{self.tag.name} - {self.date}'
+
+
+class DeletionJob(models.Model):
+    """
+    Background purge of a deleted study set or user.
+    The object is hidden when the job is created; the purge_deleted
+    command then removes its rows in batches (see admin_panel.deletion).
+    """
+    KIND_CHOICES = [
+        ('study_set', 'مجموعة دراسية'),
+        ('user', 'مستخدم'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'قيد التنفيذ'),
+        ('done', 'مكتمل'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='النوع')
+    object_id = models.BigIntegerField(verbose_name='معرف العنصر')
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='الحالة'
+    )
+    # Progress: index of the purge step in progress, and rows removed so far
+    step = models.PositiveSmallIntegerField(default=0)
+    rows_deleted = models.PositiveIntegerField(default=0, verbose_name='الصفوف المحذوفة')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'مهمة حذف'
+        verbose_name_plural = 'مهام الحذف'
+        indexes = [
+            # Worker: pending jobs, oldest first
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(status='pending'),
+                name='deletionjob_pending_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'حذف {self.get_kind_display()} {self.object_id}'
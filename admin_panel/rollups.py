@@ -0,0 +1,95 @@
+"""
+Daily activity rollups for the admin trends charts.
+
+Each run recounts only the days from the last rolled-up day (which may
+have been partial when it was counted) up to today, with one grouped
+query per source table over an indexed created_at range. Rows are
+upserted, so running it again, or over days already rolled up, gives the
+same result.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from posts.models import Post, PostTag, Comment, Reaction
+from study.models import StudySet
+from .models import Report, DailyStat, DailyTagStat
+
+# DailyStat field -> (queryset, datetime field counted by day)
+SOURCES = {
+    'new_users': (User.objects.all(), 'date_joined'),
+    'new_posts': (Post.objects.all(), 'created_at'),
+    'new_comments': (Comment.objects.all(), 'created_at'),
+    'new_reactions': (Reaction.objects.all(), 'created_at'),
+    'new_reports': (Report.objects.all(), 'created_at'),
+    'new_generations': (StudySet.objects.all(), 'created_at'),
+}
+
+
+def start_of_day(day):
+    """Aware datetime for the start of day in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def counts_by_day(queryset, field, since):
+    """{date: count} of rows with field >= since."""
+    return dict(queryset.filter(**{f'{field}__gte': since}).annotate(
+        day=TruncDate(field)
+    ).values('day').annotate(total=Count('pk')).values_list('day', 'total'))
+
+
+def get_rollup_start():
+    """First day that needs (re)counting, or None if there is no data."""
+    last_day = DailyStat.objects.aggregate(last_day=Max('date'))['last_day']
+    if last_day:
+        return last_day
+    first_join = User.objects.aggregate(first_join=Min('date_joined'))['first_join']
+    return timezone.localdate(first_join) if first_join else None
+
+
+def rollup_daily_stats(start):
+    """
+    Recount DailyStat and DailyTagStat rows from start up to today.
+    Returns the number of days rolled up.
+    """
+    today = timezone.localdate()
+    since = start_of_day(start)
+    days = [start + timedelta(days=i) for i in range((today - start).days + 1)]
+
+    counts = {
+        field: counts_by_day(queryset, date_field, since)
+        for field, (queryset, date_field) in SOURCES.items()
+    }
+    daily_stats = [
+        DailyStat(date=day, **{field: counts[field].get(day, 0) for field in SOURCES})
+        for day in days
+    ]
+
+    tag_counts = PostTag.objects.filter(
+        post__created_at__gte=since
+    ).annotate(
+        day=TruncDate('post__created_at')
+    ).values('day', 'tag_id').annotate(total=Count('pk'))
+
+    daily_tag_stats = [
+        DailyTagStat(date=row['day'], tag_id=row['tag_id'], new_posts=row['total'])
+        for row in tag_counts
+    ]
+
+    with transaction.atomic():
+        DailyStat.objects.bulk_create(
+            daily_stats,
+            update_conflicts=True,
+            unique_fields=['date'],
+            update_fields=[*SOURCES, 'updated_at'],
+        )
+        # Tags can drop to zero on a recounted day (e.g. a tag removed from a post)
+        DailyTagStat.objects.filter(date__gte=start).delete()
+        DailyTagStat.objects.bulk_create(daily_tag_stats)
+
+    return len(days)
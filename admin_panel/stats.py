@@ -0,0 +1,78 @@
+"""
+Statistics shown on the admin dashboard.
+
+All the counts are read in one query (conditional aggregates over the
+posts, with the users, comments and pending reports as scalar
+subqueries), and the whole result is cached for a short time (see
+miftah.caching), so staff refreshing the dashboard together cost one
+round of aggregates per STATS_CACHE_TIMEOUT. Report writes drop the
+cache, so the pending reports badge is never stale.
+"""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from miftah.caching import get_or_compute, invalidate
+from posts.models import Post, Tag
+
+STATS_CACHE_KEY = 'admin_panel:dashboard_stats'
+STATS_CACHE_TIMEOUT = 60  # seconds
+
+COUNTS_SQL = """
+    SELECT
+        (SELECT count(*) FROM auth_user),
+        (SELECT count(*) FROM posts_comment WHERE deleted_at IS NULL),
+        (SELECT count(*) FROM admin_panel_report WHERE status = 'pending'),
+        count(*),
+        count(*) FILTER (WHERE created_at >= %(day_ago)s),
+        count(*) FILTER (WHERE created_at >= %(week_ago)s)
+    FROM posts_post
+    WHERE deleted_at IS NULL
+"""
+
+
+def compute_dashboard_stats():
+    """Run the dashboard aggregates."""
+    now = timezone.now()
+
+    with connection.cursor() as cursor:
+        cursor.execute(COUNTS_SQL, {
+            'day_ago': now - timedelta(hours=24),
+            'week_ago': now - timedelta(days=7),
+        })
+        counts = dict(zip(
+            [
+                'total_users', 'total_comments', 'pending_reports_count',
+                'total_posts', 'posts_24h', 'posts_7d',
+            ],
+            cursor.fetchone()
+        ))
+
+    # Top 5 most liked posts
+    top_posts = list(Post.objects.filter(
+        deleted_at__isnull=True
+    ).select_related('author').order_by('-likes_count')[:5])
+
+    # Most used tags (top 10)
+    top_tags = list(Tag.objects.annotate(
+        post_count=Count('posts', filter=Q(posts__deleted_at__isnull=True))
+    ).order_by('-post_count')[:10])
+
+    return {
+        **counts,
+        'top_posts': top_posts,
+        'top_tags': top_tags,
+    }
+
+
+def get_dashboard_stats():
+    """Dashboard statistics, cached for STATS_CACHE_TIMEOUT."""
+    return get_or_compute(STATS_CACHE_KEY, compute_dashboard_stats, STATS_CACHE_TIMEOUT)
+
+
+def invalidate_dashboard_stats():
+    """Drop the cached statistics once the current transaction commits."""
+    invalidate(STATS_CACHE_KEY)
@@ -1,3 +1,261 @@
+"""
+Tests for moderation views and the admin panel's background jobs.
+"""
+
+import io
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Follow
+from posts.models import Comment, Post, Tag
+from study.models import Flashcard, StudySet
+from .deletion import purge_batch, schedule_user_deletion
+from .models import DailyStat, DailyTagStat, Report
+from .rollups import get_rollup_start
+from .stats import compute_dashboard_stats
+
+
+class ModerationQueueTests(TestCase):
+    """Pending reports are grouped by object and resolved in bulk."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        author = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=author, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.post = Post.objects.create(author=author, study_set=study_set, title='منشور')
+        cls.comment = Comment.objects.create(post=cls.post, author=author, body='تعليق')
+        for i in range(3):
+            reporter = User.objects.create_user(f'reporter{i}', password='pass')
+            Report.objects.create(reporter=reporter, content_object=cls.post, reason='spam')
+        Report.objects.create(reporter=reporter, content_object=cls.comment, reason='other')
+
+    def setUp(self):
+        self.client.force_login(self.staff)
+
+    def target(self, obj):
+        return f'{ContentType.objects.get_for_model(obj).pk}:{obj.pk}'
+
+    def test_queue_groups_reports_by_object(self):
+        response = self.client.get(reverse('admin_panel:moderation_queue'))
+        groups = response.context['groups']
+        self.assertEqual(
+            [(group['content_object'], group['report_count']) for group in groups],
+            [(self.post, 3), (self.comment, 1)]
+        )
+
+    def test_bulk_approve_resolves_every_report_on_the_object(self):
+        response = self.client.post(reverse('admin_panel:bulk_resolve_reports'), {
+            'action': 'approve', 'targets': [self.target(self.post)],
+        })
+        self.assertRedirects(response, reverse('admin_panel:moderation_queue'))
+
+        self.assertTrue(Post.objects.get(pk=self.post.pk).is_deleted)
+        post_reports = Report.objects.filter(object_id=self.post.pk, content_type__model='post')
+        self.assertEqual(set(post_reports.values_list('status', flat=True)), {'approved'})
+        self.assertEqual(set(post_reports.values_list('reviewed_by', flat=True)), {self.staff.pk})
+        # The comment was not selected
+        self.assertEqual(Report.objects.get(content_type__model='comment').status, 'pending')
+
+    def test_bulk_dismiss_keeps_the_content(self):
+        self.client.post(reverse('admin_panel:bulk_resolve_reports'), {
+            'action': 'dismiss', 'targets': [self.target(self.post), self.target(self.comment)],
+        })
+        self.assertEqual(set(Report.objects.values_list('status', flat=True)), {'dismissed'})
+        self.assertFalse(Post.objects.get(pk=self.post.pk).is_deleted)
+        self.assertIsNone(Comment.objects.get(pk=self.comment.pk).deleted_at)
+
+    def test_invalid_action_resolves_nothing(self):
+        self.client.post(reverse('admin_panel:bulk_resolve_reports'), {
+            'action': 'delete', 'targets': [self.target(self.post)],
+        })
+        self.assertEqual(set(Report.objects.values_list('status', flat=True)), {'pending'})
+
+
+class ReportsListTests(TestCase):
+    """The reports list loads reported content with one query per type."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.study_set = StudySet.objects.create(
+            owner=cls.author, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.reporters = [User.objects.create_user(f'reporter{i}', password='pass') for i in range(5)]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.staff)
+
+    def add_reports(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.author, study_set=self.study_set, title='منشور')
+            comment = Comment.objects.create(post=post, author=self.author, body='تعليق')
+            reporter = self.reporters[i % len(self.reporters)]
+            Report.objects.create(reporter=reporter, content_object=post, reason='spam')
+            Report.objects.create(reporter=reporter, content_object=comment, reason='spam')
+
+    def test_query_count_does_not_grow_with_reports(self):
+        url = reverse('admin_panel:reports_list')
+        self.add_reports(1)
+        self.client.get(url)  # Fills the content type and statistics caches
+
+        # user (the session is cached), reports, comments, posts
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['reports']), 2)
+
+        self.add_reports(5)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['reports']), 12)
+        self.assertContains(response, 'reporter4')
+
+
+class DashboardStatsTests(TestCase):
+    """Dashboard counts are read in one query and cached until reports change."""
+
+    def test_counts(self):
+        author = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=author, set_type='quiz', language='ar', source_text='نص'
+        )
+        posts = [
+            Post.objects.create(author=author, study_set=study_set, title='منشور')
+            for _ in range(3)
+        ]
+        Post.objects.filter(pk=posts[0].pk).update(created_at=timezone.now() - timedelta(days=3))
+        posts[2].soft_delete()
+        Comment.objects.create(post=posts[0], author=author, body='تعليق')
+        Report.objects.create(reporter=author, content_object=posts[0], reason='spam')
+        Report.objects.create(
+            reporter=author, content_object=posts[1], reason='spam', status='dismissed'
+        )
+
+        # counts, top posts, top tags
+        with self.assertNumQueries(3):
+            stats = compute_dashboard_stats()
+        names = [
+            'total_users', 'total_comments', 'pending_reports_count',
+            'total_posts', 'posts_24h', 'posts_7d',
+        ]
+        self.assertEqual([stats[name] for name in names], [1, 1, 1, 2, 1, 2])
+
+    def test_report_writes_refresh_the_pending_count(self):
+        staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        author = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=author, set_type='quiz', language='ar', source_text='نص'
+        )
+        post = Post.objects.create(author=author, study_set=study_set, title='منشور')
+        reporter = User.objects.create_user('reporter', password='pass')
+        cache.clear()
+        self.client.force_login(staff)
+        url = reverse('admin_panel:dashboard')
+        self.assertEqual(self.client.get(url).context['pending_reports_count'], 0)
+
+        self.client.force_login(reporter)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin_panel:submit_report'), {
+                'content_type': 'post', 'object_id': post.pk, 'reason': 'spam',
+            })
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url).context['pending_reports_count'], 1)
+
+        report = Report.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('admin_panel:dismiss_report', args=[report.pk]))
+        self.assertEqual(self.client.get(url).context['pending_reports_count'], 0)
+
+
+class RollupTests(TestCase):
+    """Daily rollups recount from the last rolled-up day and are idempotent."""
+
+    def snapshot(self):
+        return (
+            list(DailyStat.objects.values_list('date', 'new_users', 'new_posts')),
+            list(DailyTagStat.objects.order_by('date').values_list('date', 'tag_id', 'new_posts')),
+        )
+
+    def test_rerunning_the_last_day(self):
+        today = timezone.localdate()
+        author = User.objects.create_user('author', password='pass')
+        User.objects.filter(pk=author.pk).update(date_joined=timezone.now() - timedelta(days=2))
+        study_set = StudySet.objects.create(
+            owner=author, set_type='quiz', language='ar', source_text='نص'
+        )
+        tag = Tag.objects.create(name='رياضيات')
+        old_post = Post.objects.create(author=author, study_set=study_set, title='قديم')
+        old_post.tags.add(tag)
+        Post.objects.filter(pk=old_post.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        call_command('rollup_stats', stdout=io.StringIO())
+        self.assertEqual(DailyStat.objects.count(), 3)
+        self.assertEqual(get_rollup_start(), today)
+
+        # Today was partial when it was counted
+        Post.objects.create(author=author, study_set=study_set, title='جديد').tags.add(tag)
+        call_command('rollup_stats', stdout=io.StringIO())
+        stats, tag_stats = self.snapshot()
+        self.assertEqual(stats, [
+            (today - timedelta(days=2), 1, 0),
+            (today - timedelta(days=1), 0, 1),
+            (today, 0, 1),
+        ])
+        self.assertEqual(tag_stats, [
+            (today - timedelta(days=1), tag.pk, 1),
+            (today, tag.pk, 1),
+        ])
+
+        call_command('rollup_stats', stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), (stats, tag_stats))
+
+
+class DeletionJobTests(TestCase):
+    """Deleted users are hidden at once and purged in batches."""
+
+    def test_user_deletion(self):
+        user = User.objects.create_user('leaving', password='pass')
+        friend = User.objects.create_user('friend', password='pass')
+        study_set = StudySet.objects.create(
+            owner=user, set_type='flashcards', language='ar', source_text='نص'
+        )
+        Flashcard.objects.bulk_create([
+            Flashcard(study_set=study_set, index=i, question='س', answer='ج') for i in range(5)
+        ])
+        post = Post.objects.create(author=user, study_set=study_set, title='منشور')
+        Follow.objects.create(follower=friend, following=user)
+        # Another user's post sharing the study set, and reports on both
+        shared = Post.objects.create(author=friend, study_set=study_set, title='مشاركة')
+        comment = Comment.objects.create(post=shared, author=friend, body='تعليق')
+        for content in (post, shared, comment):
+            Report.objects.create(reporter=friend, content_object=content, reason='spam')
+
+        job = schedule_user_deletion(user)
+        self.assertFalse(User.objects.get(pk=user.pk).is_active)
+        self.assertTrue(Post.objects.get(pk=post.pk).is_deleted)
+        self.assertTrue(Post.objects.get(pk=shared.pk).is_deleted)
+
+        while purge_batch(job.pk, batch_size=2):
+            pass
 
-# Create your tests here.
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertFalse(User.objects.filter(pk=user.pk).exists())
+        self.assertFalse(Flashcard.objects.filter(study_set_id=study_set.pk).exists())
+        self.assertFalse(Post.objects.filter(pk=shared.pk).exists())
+        self.assertFalse(Report.objects.exists())
+        friend.profile.refresh_from_db()
+        self.assertEqual(friend.profile.following_count, 0)
+        # Followed, then unfollowed by the purge: the following feed changed
+        self.assertEqual(friend.profile.follows_version, 2)
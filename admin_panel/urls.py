@@ -10,6 +10,7 @@ app_name = 'admin_panel'
 urlpatterns = [
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('trends/', views.trends, name='trends'),
 
     # Reports management
     path('reports/', views.reports_list, name='reports_list'),
@@ -17,6 +18,10 @@ urlpatterns = [
     path('reports/<int:pk>/approve/', views.approve_report, name='approve_report'),
     path('reports/<int:pk>/dismiss/', views.dismiss_report, name='dismiss_report'),
 
+    # Moderation queue (reports grouped by reported object)
+    path('moderation/', views.moderation_queue, name='moderation_queue'),
+    path('moderation/resolve/', views.bulk_resolve_reports, name='bulk_resolve_reports'),
+
     # Report submission (for users)
     path('report/submit/', views.submit_report, name='submit_report'),
 ]
@@ -7,16 +7,44 @@ from datetime import timedelta
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from django.db.models import Count, Q
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
 from django.utils import timezone
 
-from posts.models import Post, Comment, Tag
-from .models import Report
+from miftah.pagination import paginate_by_cursor
+from posts.models import (
+    Post, Comment, ArchivedPost, ArchivedComment,
+    soft_delete_comments, soft_delete_posts,
+)
+from posts.tag_registry import get_tags_by_ids
+from .models import Report, DailyStat, DailyTagStat, get_content_preview
 from .forms import ReportForm
+from .stats import get_dashboard_stats, invalidate_dashboard_stats
+
+# Reported objects shown on the moderation queue
+QUEUE_LIMIT = 50
+
+# Reports per page on the reports list
+REPORTS_PAGE_SIZE = 50
+
+# Trends charts: selectable ranges (days) and number of tags charted
+TREND_RANGES = (7, 30, 90)
+TREND_TOP_TAGS = 5
+
+# DailyStat field -> chart series label
+TREND_SERIES = [
+    ('new_users', 'مستخدمون جدد'),
+    ('new_posts', 'منشورات'),
+    ('new_comments', 'تعليقات'),
+    ('new_reactions', 'تفاعلات'),
+    ('new_reports', 'بلاغات'),
+    ('new_generations', 'مجموعات دراسية'),
+]
 
 
 def staff_required(user):
@@ -24,6 +52,84 @@ def staff_required(user):
     return user.is_authenticated and user.is_staff
 
 
+def with_reported_content(reports):
+    """
+    Load reporters and reported content for a reports queryset: one query
+    per content type, with authors joined in.
+    """
+    return reports.select_related('reporter', 'content_type').prefetch_related(
+        GenericPrefetch('content_object', [
+            Post.objects.select_related('author'),
+            Comment.objects.select_related('author'),
+            ArchivedPost.objects.select_related('author'),
+            ArchivedComment.objects.select_related('author'),
+        ])
+    )
+
+
+def get_reported_objects(targets):
+    """
+    Load reported objects for (content_type_id, object_id) pairs, one
+    query per content type, with authors joined in.
+    Returns {(content_type_id, object_id): object}.
+    """
+    ids_by_type = {}
+    for content_type_id, object_id in targets:
+        ids_by_type.setdefault(content_type_id, set()).add(object_id)
+
+    objects = {}
+    for content_type_id, object_ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset = model._default_manager.filter(pk__in=object_ids)
+        if any(field.name == 'author' for field in model._meta.fields):
+            queryset = queryset.select_related('author')
+        for obj in queryset:
+            objects[(content_type_id, obj.pk)] = obj
+    return objects
+
+
+def resolve_reports(targets, status, reviewer):
+    """
+    Resolve every pending report on the given (content_type_id, object_id)
+    pairs in one transaction. Approving also soft-deletes the reported
+    posts and comments. Returns the number of reports resolved.
+    """
+    if not targets:
+        return 0
+
+    ids_by_type = {}
+    for content_type_id, object_id in targets:
+        ids_by_type.setdefault(content_type_id, []).append(object_id)
+
+    with transaction.atomic():
+        if status == 'approved':
+            post_type = ContentType.objects.get_for_model(Post)
+            comment_type = ContentType.objects.get_for_model(Comment)
+            soft_delete_posts(ids_by_type.get(post_type.pk, []))
+            soft_delete_comments(ids_by_type.get(comment_type.pk, []))
+
+        reports_filter = Q()
+        for content_type_id, object_ids in ids_by_type.items():
+            reports_filter |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+        invalidate_dashboard_stats()
+        return Report.objects.filter(reports_filter, status='pending').update(
+            status=status,
+            reviewed_by=reviewer,
+            reviewed_at=timezone.now()
+        )
+
+
+def parse_targets(values):
+    """Parse 'content_type_id:object_id' form values, skipping invalid ones."""
+    targets = []
+    for value in values:
+        content_type_id, _, object_id = value.partition(':')
+        if content_type_id.isdigit() and object_id.isdigit():
+            targets.append((int(content_type_id), int(object_id)))
+    return targets
+
+
 # =============================================================================
 # ADMIN DASHBOARD VIEWS (Staff only)
 # =============================================================================
@@ -32,57 +138,80 @@ def staff_required(user):
 @user_passes_test(staff_required, login_url='home')
 def dashboard(request):
     """Main admin dashboard with statistics."""
-    now = timezone.now()
-
-    # Basic counts
-    total_users = User.objects.count()
-    total_posts = Post.objects.filter(deleted_at__isnull=True).count()
-    total_comments = Comment.objects.filter(deleted_at__isnull=True).count()
-
-    # Posts in timeframes
-    posts_24h = Post.objects.filter(
-        deleted_at__isnull=True,
-        created_at__gte=now - timedelta(hours=24)
-    ).count()
-
-    posts_7d = Post.objects.filter(
-        deleted_at__isnull=True,
-        created_at__gte=now - timedelta(days=7)
-    ).count()
-
-    # Top 5 most liked posts
-    top_posts = Post.objects.filter(
-        deleted_at__isnull=True
-    ).annotate(
-        like_count=Count('reactions', filter=Q(reactions__value='like'))
-    ).order_by('-like_count')[:5]
-
-    # Most used tags (top 10)
-    top_tags = Tag.objects.annotate(
-        post_count=Count('posts', filter=Q(posts__deleted_at__isnull=True))
-    ).order_by('-post_count')[:10]
-
-    # Pending reports
-    pending_reports_count = Report.objects.filter(status='pending').count()
+    stats = get_dashboard_stats()
 
     # Recent reports
-    recent_reports = Report.objects.filter(status='pending').order_by('-created_at')[:5]
+    recent_reports = with_reported_content(
+        Report.objects.filter(status='pending').order_by('-created_at')[:5]
+    )
 
     context = {
-        'total_users': total_users,
-        'total_posts': total_posts,
-        'total_comments': total_comments,
-        'posts_24h': posts_24h,
-        'posts_7d': posts_7d,
-        'top_posts': top_posts,
-        'top_tags': top_tags,
-        'pending_reports_count': pending_reports_count,
+        **stats,
         'recent_reports': recent_reports,
     }
 
     return render(request, 'admin_panel/dashboard.html', context)
 
 
+@login_required
+@user_passes_test(staff_required, login_url='home')
+def trends(request):
+    """Daily activity charts, read from the rollup tables (see admin_panel.rollups)."""
+    days = request.GET.get('days', '30')
+    days = int(days) if days.isdigit() and int(days) in TREND_RANGES else 30
+
+    today = timezone.localdate()
+    dates = [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+
+    stats_by_date = {
+        stat.date: stat for stat in DailyStat.objects.filter(date__gte=dates[0])
+    }
+    activity = [
+        {
+            'label': label,
+            'data': [getattr(stats_by_date.get(day), field, 0) for day in dates],
+        }
+        for field, label in TREND_SERIES
+    ]
+
+    # Most used tags over the range, one series each
+    tag_stats = DailyTagStat.objects.filter(date__gte=dates[0])
+    top_tag_ids = list(tag_stats.values('tag_id').annotate(
+        total=Sum('new_posts')
+    ).order_by('-total').values_list('tag_id', flat=True)[:TREND_TOP_TAGS])
+
+    tag_counts = {
+        (date, tag_id): new_posts
+        for date, tag_id, new_posts in tag_stats.filter(
+            tag_id__in=top_tag_ids
+        ).values_list('date', 'tag_id', 'new_posts')
+    }
+    tags = [
+        {
+            'label': tag.name,
+            'color': tag.color,
+            'data': [tag_counts.get((day, tag.pk), 0) for day in dates],
+        }
+        for tag in get_tags_by_ids(top_tag_ids)
+    ]
+
+    # Pending count for badge
+    pending_reports_count = get_dashboard_stats()['pending_reports_count']
+
+    context = {
+        'days': days,
+        'trend_ranges': TREND_RANGES,
+        'chart_data': {
+            'labels': [day.strftime('%m/%d') for day in dates],
+            'activity': activity,
+            'tags': tags,
+        },
+        'pending_reports_count': pending_reports_count,
+    }
+
+    return render(request, 'admin_panel/trends.html', context)
+
+
 @login_required
 @user_passes_test(staff_required, login_url='home')
 def reports_list(request):
@@ -94,11 +223,19 @@ def reports_list(request):
     else:
         reports = Report.objects.filter(status=status_filter)
 
+    reports, next_cursor = paginate_by_cursor(
+        with_reported_content(reports),
+        request.GET.get('after'),
+        REPORTS_PAGE_SIZE
+    )
+
     # Pending count for badge
-    pending_reports_count = Report.objects.filter(status='pending').count()
+    pending_reports_count = get_dashboard_stats()['pending_reports_count']
 
     context = {
         'reports': reports,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('after'),
         'status_filter': status_filter,
         'pending_reports_count': pending_reports_count,
     }
@@ -106,6 +243,64 @@ def reports_list(request):
     return render(request, 'admin_panel/reports/list.html', context)
 
 
+@login_required
+@user_passes_test(staff_required, login_url='home')
+def moderation_queue(request):
+    """Pending reports grouped by reported object, most reported first."""
+    groups = list(Report.objects.filter(
+        status='pending'
+    ).values('content_type_id', 'object_id').annotate(
+        report_count=Count('pk'),
+        reasons=ArrayAgg('reason', distinct=True),
+        latest_at=Max('created_at'),
+    ).order_by('-report_count', '-latest_at')[:QUEUE_LIMIT])
+
+    reported_objects = get_reported_objects(
+        (group['content_type_id'], group['object_id']) for group in groups
+    )
+    reason_labels = dict(Report.REASON_CHOICES)
+    for group in groups:
+        group['content_type'] = ContentType.objects.get_for_id(group['content_type_id'])
+        group['content_object'] = reported_objects.get(
+            (group['content_type_id'], group['object_id'])
+        )
+        group['preview'] = get_content_preview(group['content_object'])
+        group['reason_labels'] = [reason_labels.get(reason, reason) for reason in group['reasons']]
+
+    # Pending count for badge
+    pending_reports_count = get_dashboard_stats()['pending_reports_count']
+
+    context = {
+        'groups': groups,
+        'pending_reports_count': pending_reports_count,
+    }
+
+    return render(request, 'admin_panel/reports/queue.html', context)
+
+
+@login_required
+@user_passes_test(staff_required, login_url='home')
+@require_POST
+def bulk_resolve_reports(request):
+    """Approve or dismiss all pending reports on the selected objects."""
+    action = request.POST.get('action')
+    targets = parse_targets(request.POST.getlist('targets'))
+
+    if action not in ('approve', 'dismiss') or not targets:
+        messages.error(request, 'يرجى اختيار محتوى وإجراء صالح.')
+        return redirect('admin_panel:moderation_queue')
+
+    status = 'approved' if action == 'approve' else 'dismissed'
+    resolved_count = resolve_reports(targets, status, request.user)
+
+    if status == 'approved':
+        messages.success(request, f'تم قبول {resolved_count} بلاغ وحذف المحتوى.')
+    else:
+        messages.success(request, f'تم رفض {resolved_count} بلاغ.')
+
+    return redirect('admin_panel:moderation_queue')
+
+
 @login_required
 @user_passes_test(staff_required, login_url='home')
 def report_detail(request, pk):
@@ -113,7 +308,7 @@ def report_detail(request, pk):
     report = get_object_or_404(Report, pk=pk)
 
     # Pending count for badge
-    pending_reports_count = Report.objects.filter(status='pending').count()
+    pending_reports_count = get_dashboard_stats()['pending_reports_count']
 
     context = {
         'report': report,
@@ -130,17 +325,9 @@ def approve_report(request, pk):
     """Approve report and soft-delete the content."""
     report = get_object_or_404(Report, pk=pk)
 
-    # Soft delete the reported content
-    content = report.content_object
-    if content and hasattr(content, 'deleted_at'):
-        content.deleted_at = timezone.now()
-        content.save()
-
-    # Update report status
-    report.status = 'approved'
-    report.reviewed_by = request.user
-    report.reviewed_at = timezone.now()
-    report.save()
+    # Soft delete the reported content; other pending reports on it are
+    # resolved along with this one
+    resolve_reports([(report.content_type_id, report.object_id)], 'approved', request.user)
 
     messages.success(request, 'تم قبول البلاغ وحذف المحتوى.')
 
@@ -165,6 +352,7 @@ def dismiss_report(request, pk):
     report.reviewed_by = request.user
     report.reviewed_at = timezone.now()
     report.save()
+    invalidate_dashboard_stats()
 
     messages.success(request, 'تم رفض البلاغ.')
 
@@ -258,6 +446,7 @@ def submit_report(request):
         reason=reason,
         details=details
     )
+    invalidate_dashboard_stats()
 
     if request.headers.get('HX-Request'):
         return HttpResponse(
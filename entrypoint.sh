@@ -21,6 +21,17 @@ echo "PostgreSQL is up - continuing..."
 echo "Running migrations..."
 python manage.py migrate --noinput
 
-# Start server
-echo "Starting Django server..."
-exec python manage.py runserver 0.0.0.0:8000
+# Start server: the dev server with DEBUG=True, Gunicorn otherwise
+# (settings in gunicorn.conf.py; exec so it gets the reload signals)
+case "${DEBUG,,}" in
+    true|1|yes|on)
+        echo "Starting Django development server..."
+        exec python manage.py runserver 0.0.0.0:8000
+        ;;
+    *)
+        echo "Collecting static files..."
+        python manage.py collectstatic --noinput
+        echo "Starting Gunicorn..."
+        exec gunicorn
+        ;;
+esac
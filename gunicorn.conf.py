@@ -0,0 +1,69 @@
+"""
+Gunicorn settings for serving Miftah in production.
+
+Gunicorn loads this file from the working directory, so entrypoint.sh
+just runs `gunicorn`. Every value can be overridden from the environment.
+
+Two worker modes, picked with GUNICORN_WORKER_CLASS:
+  uvicorn - (default) ASGI workers; async views such as study generation
+            wait on OpenAI without holding a thread. One worker per core
+            serves many requests at once. Database connections are pooled
+            (DB_POOL) unless DB_POOL=False is set.
+  gthread - WSGI workers with a thread pool each, sized from the cores.
+
+With more than one worker the cache must be shared (CACHE_BACKEND redis
+or file), so the server refuses to start with the per-process locmem.
+
+Workers are recycled after about GUNICORN_MAX_REQUESTS requests, and
+`kill -HUP <master pid>` (docker compose kill -s HUP web) reloads the
+code by starting new workers and letting the old ones finish their
+requests within graceful_timeout. The app is not preloaded, so a reload
+picks up new code.
+"""
+
+import multiprocessing
+import os
+
+# Imported as a module: a top-level "config" would be read as a setting
+import decouple
+
+cpus = multiprocessing.cpu_count()
+worker_mode = decouple.config('GUNICORN_WORKER_CLASS', default='uvicorn')
+
+if worker_mode == 'uvicorn':
+    wsgi_app = 'miftah.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+    workers = decouple.config('WEB_CONCURRENCY', default=cpus + 1, cast=int)
+    # Sync code runs in a fresh thread per request under ASGI, so a
+    # persistent connection would never be reused; pool them instead
+    os.environ.setdefault('DB_POOL', 'True')
+elif worker_mode == 'gthread':
+    wsgi_app = 'miftah.wsgi:application'
+    worker_class = 'gthread'
+    workers = decouple.config('WEB_CONCURRENCY', default=cpus + 1, cast=int)
+    threads = decouple.config('GUNICORN_THREADS', default=2 * cpus, cast=int)
+else:
+    raise RuntimeError(f'GUNICORN_WORKER_CLASS must be uvicorn or gthread, not {worker_mode!r}')
+
+# Cached sessions (a logout must reach every worker), the newest post id
+# and the get_or_compute() locks must be shared by the workers
+if workers > 1 and decouple.config('CACHE_BACKEND', default='locmem') == 'locmem':
+    raise RuntimeError(
+        'CACHE_BACKEND=locmem is per process; use redis (or file on a single host) '
+        'with more than one worker, or set WEB_CONCURRENCY=1'
+    )
+
+bind = decouple.config('GUNICORN_BIND', default='0.0.0.0:8000')
+
+# Recycle workers so slow leaks can't build up; the jitter keeps them
+# from all restarting at once
+max_requests = decouple.config('GUNICORN_MAX_REQUESTS', default=1000, cast=int)
+max_requests_jitter = max_requests // 10
+
+# A generation can take a minute or two; let it finish on reload
+graceful_timeout = decouple.config('GUNICORN_GRACEFUL_TIMEOUT', default=120, cast=int)
+timeout = decouple.config('GUNICORN_TIMEOUT', default=120, cast=int)
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
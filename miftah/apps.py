@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class MiftahConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'miftah'
+    verbose_name = 'مفتاح'
@@ -0,0 +1,15 @@
+"""
+ASGI config for Miftah project.
+
+Served by Gunicorn with Uvicorn workers in production (see
+gunicorn.conf.py), so async views such as study generation don't tie up
+a worker while they wait.
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'miftah.settings')
+
+application = get_asgi_application()
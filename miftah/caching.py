@@ -0,0 +1,117 @@
+"""
+Caching helpers shared by the apps.
+
+Keys are namespaced "<app>:<name>[:<part>...]". Values that must change
+together live under a namespace version: versioned_key() embeds the
+namespace's current version token, and bump_version() moves the token,
+which orphans every key built with the old one (they expire on their
+own). Single keys are dropped with invalidate().
+
+cached() is plain read-through caching. For expensive values read by
+many requests at once, get_or_compute() also avoids the stampede when
+the entry expires: requests refresh it *before* it expires, with a
+probability that rises as expiry approaches and with how long the value
+took to compute (the "XFetch" algorithm). A short lock makes sure only
+one request at a time recomputes: during an early refresh the others are
+served the cached value, and on a cold miss they wait for the value
+instead of all computing it at once.
+"""
+
+import math
+import random
+import time
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Distinguishes a cached None from a miss
+MISSING = object()
+
+# How often a request waiting for another one's get_or_compute() checks
+# the cache, in seconds
+LOCK_POLL_INTERVAL = 0.05
+
+
+def make_key(*parts):
+    """Cache key from its namespace and name parts."""
+    return ':'.join(str(part) for part in parts)
+
+
+def get_version(namespace):
+    """Current version token of a namespace, creating one if it's missing."""
+    key = make_key(namespace, 'version')
+    token = cache.get(key)
+    if token is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        token = cache.get(key)
+    return token
+
+
+def bump_version(namespace, on_commit=True):
+    """
+    Move a namespace's version token. By default this waits until the
+    current transaction commits, so no request can pair the new token
+    with data from before the write.
+    """
+    key = make_key(namespace, 'version')
+    if on_commit:
+        transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, None))
+    else:
+        cache.set(key, uuid.uuid4().hex, None)
+
+
+def versioned_key(namespace, *parts):
+    """Key under the namespace's current version."""
+    return make_key(namespace, get_version(namespace), *parts)
+
+
+def cached(key, compute, timeout):
+    """Get key from the cache, calling compute() to fill it on a miss."""
+    value = cache.get(key, MISSING)
+    if value is MISSING:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+def invalidate(*keys):
+    """Drop keys from the cache once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_or_compute(key, compute, timeout, beta=1.0, lock_timeout=10):
+    """
+    Get key from the cache, calling compute() to fill or refresh it.
+    Larger beta values refresh earlier. Requests that find another one
+    recomputing wait for it for up to lock_timeout seconds.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, compute_time, expires_at = entry
+        # log() of a number in (0, 1] is <= 0, so this moves "now" forward
+        jitter = -compute_time * beta * math.log(1.0 - random.random())
+        if time.time() + jitter < expires_at:
+            return value
+
+    lock_key = make_key(key, 'lock')
+    if not cache.add(lock_key, 1, lock_timeout):
+        if entry is not None:
+            # Another request is refreshing it; the value is still valid
+            return entry[0]
+        deadline = time.monotonic() + lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # The other request died or is too slow; compute it here
+
+    try:
+        started = time.time()
+        value = compute()
+        compute_time = time.time() - started
+        cache.set(key, (value, compute_time, started + timeout), timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
@@ -0,0 +1,103 @@
+"""
+Management command to benchmark cold startup.
+
+Times, in fresh interpreters, importing miftah.wsgi (what every Gunicorn
+worker does when it boots) and running `manage.py check` (which loads
+the URLconf and every view, like any management command or a worker's
+first request). The median of each is compared with a baseline saved by
+an earlier --save-baseline run on the same machine, and the command
+fails if one got more than --tolerance slower, or if a module that must
+be imported lazily (LAZY_MODULES) is loaded at startup.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Heavy dependencies that may only be imported when first used
+LAZY_MODULES = ['openai', 'pypdf']
+
+BASELINE_FILE = settings.BASE_DIR / '.startup_baseline.json'
+
+# Name -> command run in a fresh interpreter
+TARGETS = {
+    'wsgi import': [sys.executable, '-c', 'import miftah.wsgi'],
+    'manage.py check': [sys.executable, 'manage.py', 'check'],
+}
+
+# Loads the app and the URLconf, then prints the lazy modules that got imported
+LAZY_CHECK = (
+    'import sys, miftah.wsgi, miftah.urls\n'
+    f'print(",".join(m for m in {LAZY_MODULES!r} if m in sys.modules))'
+)
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks cold import of miftah.wsgi and manage.py check against a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per target')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed slowdown over the baseline (0.25 = 25%%)'
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true', help='Store these timings as the baseline'
+        )
+
+    def run(self, command):
+        """Run command once; returns its wall time in seconds."""
+        started = time.perf_counter()
+        result = subprocess.run(
+            command, cwd=settings.BASE_DIR, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode:
+            raise CommandError(f'{" ".join(command)} فشل:\n{result.stderr}')
+        return elapsed
+
+    def handle(self, *args, **options):
+        loaded = subprocess.run(
+            [sys.executable, '-c', LAZY_CHECK],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+        timings = {}
+        for name, command in TARGETS.items():
+            self.run(command)  # Warm-up: writes .pyc files and the OS cache
+            timings[name] = statistics.median(
+                self.run(command) for _ in range(options['runs'])
+            )
+
+        baseline = {}
+        if BASELINE_FILE.exists():
+            baseline = json.loads(BASELINE_FILE.read_text())
+
+        regressions = []
+        for name, seconds in timings.items():
+            line = f'{name + ":":<17} {seconds * 1000:7.0f} ms'
+            if name in baseline:
+                change = seconds / baseline[name] - 1
+                line += f'  (baseline {baseline[name] * 1000:.0f} ms, {change:+.0%})'
+                if change > options['tolerance']:
+                    regressions.append(name)
+            self.stdout.write(line)
+        self.stdout.write(f'{"lazy modules:":<17} {loaded or "none loaded"}')
+
+        if options['save_baseline']:
+            BASELINE_FILE.write_text(json.dumps(timings, indent=2))
+            self.stdout.write(f'Baseline saved to {BASELINE_FILE}')
+        elif not baseline:
+            self.stdout.write('No baseline yet; run with --save-baseline to store one.')
+
+        if loaded:
+            raise CommandError(f'فشل الاختبار: وحدات ثقيلة تُحمّل عند بدء التشغيل: {loaded}')
+        if regressions:
+            raise CommandError(f'فشل الاختبار: بدء التشغيل أبطأ من المرجع: {", ".join(regressions)}')
+
+        self.stdout.write(self.style.SUCCESS('تم الاختبار بنجاح.'))
@@ -0,0 +1,84 @@
+"""
+Shared model helpers.
+
+DirtyFieldsMixin remembers each field's value as loaded (or as last
+saved) so that a plain save() writes only the fields that changed, and
+issues no query at all when nothing did. Besides saving the round trip,
+this keeps a save from rewriting columns that other code updates with
+F() expressions, such as counters, with a stale in-memory value.
+"""
+
+import copy
+
+from django.db import models
+
+# Marker for a field whose loaded value is unknown (deferred, then set)
+UNKNOWN = object()
+
+
+class DirtyFieldsMixin(models.Model):
+    """Model mixin that saves only changed fields."""
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _tracked_fields(self):
+        return [field for field in self._meta.concrete_fields if not field.primary_key]
+
+    def _remember_values(self, fields=None):
+        """Snapshot the current values of fields (default: all loaded fields)."""
+        if not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._tracked_fields() if fields is None else fields:
+            if field.attname in self.__dict__:
+                # Copy mutable values (e.g. ArrayField lists) so in-place edits show up
+                self._loaded_values[field.attname] = copy.copy(self.__dict__[field.attname])
+
+    def get_dirty_fields(self):
+        """Names of the fields changed since the instance was loaded or saved."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            # Built by hand rather than loaded, so any field may differ
+            return [field.name for field in self._tracked_fields()]
+
+        return [
+            field.name for field in self._tracked_fields()
+            if field.attname in self.__dict__
+            and loaded.get(field.attname, UNKNOWN) != self.__dict__[field.attname]
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            dirty_fields = self.get_dirty_fields()
+            if not dirty_fields:
+                return
+            kwargs['update_fields'] = dirty_fields + [
+                field.name for field in self._tracked_fields()
+                if getattr(field, 'auto_now', False) and field.name not in dirty_fields
+            ]
+        update_fields = kwargs.get('update_fields')
+        super().save(*args, **kwargs)
+
+        if update_fields is None:
+            self._remember_values()
+        else:
+            self._remember_values([
+                field for field in self._tracked_fields()
+                if field.name in update_fields or field.attname in update_fields
+            ])
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        if fields is None:
+            self._remember_values()
+        else:
+            self._remember_values([
+                field for field in self._tracked_fields()
+                if field.name in fields or field.attname in fields
+            ])
@@ -0,0 +1,56 @@
+"""
+Keyset (cursor) pagination for newest-first lists.
+
+Pages are fetched with WHERE (created_at, id) < cursor instead of OFFSET,
+so every page costs the same index range scan however deep the reader
+goes, and rows inserted meanwhile don't shift the pages. Lists can also
+be ordered by an integer field (e.g. a counter) instead of a datetime.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import DateTimeField, Q
+
+
+def encode_cursor(value, pk):
+    """Opaque cursor pointing just after the row (value, pk)."""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc).strftime('%Y%m%d%H%M%S%f')
+    return f'{value}-{pk}'
+
+
+def decode_cursor(cursor, is_datetime=True):
+    """Parse a cursor into (value, pk), or None if invalid."""
+    try:
+        value, pk = cursor.split('-')
+        if is_datetime:
+            value = datetime.strptime(value, '%Y%m%d%H%M%S%f').replace(tzinfo=dt_timezone.utc)
+        else:
+            value = int(value)
+        return value, int(pk)
+    except ValueError:
+        return None
+
+
+def paginate_by_cursor(queryset, cursor, page_size, field='created_at'):
+    """
+    Get the page of queryset after cursor, in descending (field, pk) order.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    is_datetime = isinstance(queryset.model._meta.get_field(field), DateTimeField)
+
+    position = decode_cursor(cursor, is_datetime) if cursor else None
+    if position:
+        value, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': value}) |
+            Q(**{field: value, 'pk__lt': pk})
+        )
+
+    items = list(queryset[:page_size + 1])
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        return items, encode_cursor(getattr(last, field), last.pk)
+    return items, None
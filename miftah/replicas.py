@@ -0,0 +1,120 @@
+"""
+Sending reads to a PostgreSQL replica.
+
+When DB_REPLICA_HOST is set, the 'replica' database is a streaming
+replica of 'default', and views marked with @replica_reads run their
+queries there when it is safe to:
+
+- the request is a GET or HEAD,
+- the user hasn't written anything in the last REPLICA_PIN_SECONDS (a
+  cookie set after each of their POSTs), so they always see their own
+  writes, and
+- the replica is at most REPLICA_MAX_LAG seconds behind, as measured at
+  most every REPLICA_LAG_CHECK_SECONDS and shared through the cache.
+
+Everything else, including every write and any read inside a
+transaction, goes to the primary.
+"""
+
+import contextvars
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+from .caching import cached, make_key
+
+REPLICA = 'replica'
+PIN_COOKIE = 'use_primary'
+REPLICA_LAG_KEY = make_key('miftah', 'replica_lag')
+REPLICA_LAG_CHECK_SECONDS = 5
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+# Seconds the replica is behind; 0 when it has replayed all it received
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+
+def replica_reads(view_func):
+    """Mark a read-only view whose queries may be served by the replica."""
+    view_func.replica_reads = True
+    return view_func
+
+
+def get_replica_lag():
+    """Replication lag in seconds, or None if the replica can't be reached."""
+    def compute():
+        try:
+            with connections[REPLICA].cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0] or 0)
+        except DatabaseError:
+            return None
+
+    return cached(REPLICA_LAG_KEY, compute, REPLICA_LAG_CHECK_SECONDS)
+
+
+def replica_is_fresh():
+    lag = get_replica_lag()
+    return lag is not None and lag <= settings.REPLICA_MAX_LAG
+
+
+class ReplicaRouter:
+    """Route reads to the replica while a request allows it."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or objects read from the replica would be saved there
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
+
+
+class ReplicaMiddleware:
+    """
+    Turn replica reads on for @replica_reads views, and pin the user to
+    the primary for a while after they write.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _use_replica.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _use_replica.reset(token)
+
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            getattr(view_func, 'replica_reads', False)
+            and request.method in SAFE_METHODS
+            and PIN_COOKIE not in request.COOKIES
+            # The router would send reads to the primary anyway
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+            and replica_is_fresh()
+        ):
+            _use_replica.set(True)
@@ -4,7 +4,8 @@ Django settings for Miftah project.
 
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from django.core.exceptions import ImproperlyConfigured
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -13,9 +14,10 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = config('SECRET_KEY', default='django-insecure-dev-key-change-this')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = config('DEBUG', default=True, cast=bool)
+# Set DEBUG=True in development (docker-compose does)
+DEBUG = config('DEBUG', default=False, cast=bool)
 
-ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0']
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='localhost,127.0.0.1,0.0.0.0', cast=Csv())
 
 # Application definition
 INSTALLED_APPS = [
@@ -24,8 +26,10 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     # Local apps
+    'miftah',  # Project-wide management commands
     'accounts',
     'study',
     'posts',
@@ -48,7 +52,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -56,6 +59,14 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are compiled once per process; in development the
+            # autoreloader clears the cache when a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -63,6 +74,11 @@ TEMPLATES = [
 WSGI_APPLICATION = 'miftah.wsgi.application'
 
 # Database
+# Connections are kept open for DB_CONN_MAX_AGE seconds (and checked
+# before reuse) instead of being opened for every request. DB_POOL=True
+# uses a psycopg 3 connection pool instead, shared by a process's threads.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -71,8 +87,66 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='miftah_password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        # A pool hands connections back itself, so they must not persist
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+                'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            },
+        } if DB_POOL else {},
+    }
+}
+
+# Read replica (see miftah.replicas): read-only views read from it unless
+# it lags more than DB_REPLICA_MAX_LAG seconds behind, or the user wrote
+# something in the last DB_REPLICA_PIN_SECONDS.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+REPLICA_MAX_LAG = config('DB_REPLICA_MAX_LAG', default=5, cast=float)
+REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=15, cast=int)
+
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_ROUTERS = ['miftah.replicas.ReplicaRouter']
+    MIDDLEWARE.append('miftah.replicas.ReplicaMiddleware')
+
+# Cache, selected with CACHE_BACKEND:
+#   locmem - per-process memory (default; fine for a single process)
+#   file   - files under CACHE_LOCATION, shared by processes on one host
+#   redis  - a Redis-protocol server at CACHE_LOCATION (redis://host:port/db),
+#            shared by every host; needs the redis package
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'miftah'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
 }
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ImproperlyConfigured(
+        f'CACHE_BACKEND must be one of {", ".join(CACHE_BACKENDS)}, not {CACHE_BACKEND!r}'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': config('CACHE_LOCATION', default='') or CACHE_BACKENDS[CACHE_BACKEND][1],
+        'TIMEOUT': 300,
+        # Keys are "<KEY_PREFIX>:<VERSION>:<key>"; app keys are namespaced
+        # "<app>:<name>" (see miftah.caching). Raise CACHE_VERSION to drop
+        # every cached value at once, e.g. when a deploy changes their shape.
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='miftah'),
+        'VERSION': config('CACHE_VERSION', default=1, cast=int),
+    }
+}
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
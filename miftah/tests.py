@@ -0,0 +1,170 @@
+"""
+Tests for the shared helpers in the miftah package, and for startup.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .caching import get_or_compute, make_key
+from .management.commands.bench_startup import LAZY_CHECK
+from .replicas import (
+    PIN_COOKIE, REPLICA, REPLICA_LAG_KEY, ReplicaMiddleware, ReplicaRouter,
+    _use_replica, replica_reads,
+)
+
+
+class GetOrComputeTests(SimpleTestCase):
+    """Only one request at a time recomputes a get_or_compute() entry."""
+
+    key = 'miftah:test_value'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cold_miss_waits_for_the_request_computing(self):
+        cache.add(make_key(self.key, 'lock'), 1, 10)
+        compute = mock.Mock(return_value='own')
+
+        def other_request_finishes(seconds):
+            cache.set(self.key, ('theirs', 0.1, time.time() + 60), 60)
+
+        with mock.patch('miftah.caching.time.sleep', side_effect=other_request_finishes):
+            self.assertEqual(get_or_compute(self.key, compute, 60), 'theirs')
+        compute.assert_not_called()
+
+    def test_early_refresh_serves_cached_value_while_locked(self):
+        # Past its refresh time, but still in the cache
+        cache.set(self.key, ('stale', 0.1, time.time() - 1), 60)
+        cache.add(make_key(self.key, 'lock'), 1, 10)
+        compute = mock.Mock(return_value='fresh')
+
+        self.assertEqual(get_or_compute(self.key, compute, 60), 'stale')
+        compute.assert_not_called()
+
+    def test_miss_computes_and_releases_lock(self):
+        self.assertEqual(get_or_compute(self.key, lambda: 'value', 60), 'value')
+        self.assertIsNone(cache.get(make_key(self.key, 'lock')))
+        self.assertEqual(get_or_compute(self.key, lambda: 'other', 60), 'value')
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Read-only views read from the replica only when it is safe to."""
+
+    # Not wrapped in a transaction, which would pin every read to the primary
+    databases = {'default'}
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(self.handle)
+        cache.set(REPLICA_LAG_KEY, 0)
+
+    def tearDown(self):
+        cache.delete(REPLICA_LAG_KEY)
+
+    @staticmethod
+    @replica_reads
+    def view(request):
+        return HttpResponse(ReplicaRouter().db_for_read(User))
+
+    def handle(self, request):
+        # What the handler does inside the middleware chain
+        self.middleware.process_view(request, self.view, (), {})
+        return self.view(request)
+
+    def read_alias(self, request):
+        return self.middleware(request).content.decode()
+
+    def test_fresh_replica_serves_reads(self):
+        self.assertEqual(self.read_alias(self.factory.get('/')), REPLICA)
+
+    def test_lagging_or_unreachable_replica_falls_back(self):
+        cache.set(REPLICA_LAG_KEY, 60)
+        self.assertEqual(self.read_alias(self.factory.get('/')), 'default')
+        cache.set(REPLICA_LAG_KEY, None)
+        self.assertEqual(self.read_alias(self.factory.get('/')), 'default')
+
+    def test_reads_after_own_write_use_primary(self):
+        response = self.middleware(self.factory.post('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertEqual(self.read_alias(request), 'default')
+
+    def test_writes_and_transactions_use_primary(self):
+        router = ReplicaRouter()
+        token = _use_replica.set(True)
+        try:
+            self.assertEqual(router.db_for_read(User), REPLICA)
+            self.assertEqual(router.db_for_write(User), 'default')
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(User), 'default')
+        finally:
+            _use_replica.reset(token)
+
+
+# Prints the default cache's backend class and location
+CACHE_SETTINGS_CHECK = (
+    'import json, django\n'
+    'django.setup()\n'
+    'from django.core.cache import caches\n'
+    'from django.conf import settings\n'
+    'print(json.dumps([type(caches["default"]).__name__, settings.CACHES["default"]["LOCATION"]]))'
+)
+
+
+class CacheSettingsTests(SimpleTestCase):
+    """CACHE_BACKEND and CACHE_LOCATION select the cache."""
+
+    def load(self, **env):
+        environ = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'miftah.settings', **env}
+        for name in ('CACHE_BACKEND', 'CACHE_LOCATION'):
+            if name not in env:
+                environ.pop(name, None)
+        return subprocess.run(
+            [sys.executable, '-c', CACHE_SETTINGS_CHECK],
+            cwd=settings.BASE_DIR, env=environ, capture_output=True, text=True
+        )
+
+    def test_backends(self):
+        cases = [
+            ({}, ['LocMemCache', 'miftah']),
+            ({'CACHE_BACKEND': 'file'}, ['FileBasedCache', str(settings.BASE_DIR / 'cache')]),
+            ({'CACHE_BACKEND': 'redis'}, ['RedisCache', 'redis://localhost:6379/0']),
+            (
+                {'CACHE_BACKEND': 'redis', 'CACHE_LOCATION': 'redis://redis:6379/1'},
+                ['RedisCache', 'redis://redis:6379/1'],
+            ),
+        ]
+        for env, expected in cases:
+            with self.subTest(**env):
+                result = self.load(**env)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertEqual(json.loads(result.stdout), expected)
+
+    def test_unknown_backend_is_refused(self):
+        result = self.load(CACHE_BACKEND='memcached')
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('CACHE_BACKEND must be one of', result.stderr)
+
+
+class StartupTests(SimpleTestCase):
+    """Heavy dependencies are not imported when the app starts."""
+
+    def test_lazy_modules_not_loaded(self):
+        loaded = subprocess.run(
+            [sys.executable, '-c', LAZY_CHECK],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        self.assertEqual(loaded, '')
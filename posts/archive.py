@@ -0,0 +1,125 @@
+"""
+Archival of soft-deleted posts and comments.
+
+Deleted rows stay in the hot tables (and their indexes) until they are
+older than the retention window; then they are moved, with their
+reactions and comments, into the Archived* tables. Each chunk is moved in
+its own transaction, so an interrupted run leaves nothing half-moved and
+the next run simply carries on. Reports pointing at moved rows are
+re-pointed to the archived copies, which keep the original ids.
+"""
+
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+
+from admin_panel.models import Report
+from .models import Post, Comment, ArchivedPost, ArchivedComment
+
+RETENTION = timedelta(days=30)
+
+MOVE_POSTS_SQL = """
+    WITH moved AS (
+        DELETE FROM posts_post WHERE id = ANY(%(ids)s)
+        RETURNING *
+    )
+    INSERT INTO posts_archivedpost (
+        id, author_id, study_set_id, title, caption, tag_ids,
+        likes_count, dislikes_count, comments_count,
+        created_at, deleted_at, archived_at
+    )
+    SELECT
+        id, author_id, study_set_id, title, caption, tag_ids,
+        likes_count, dislikes_count, comments_count,
+        created_at, deleted_at, %(now)s
+    FROM moved
+"""
+
+MOVE_REACTIONS_SQL = """
+    WITH moved AS (
+        DELETE FROM posts_reaction WHERE post_id = ANY(%(ids)s)
+        RETURNING *
+    )
+    INSERT INTO posts_archivedreaction (id, post_id, user_id, value, created_at, archived_at)
+    SELECT id, post_id, user_id, value, created_at, %(now)s FROM moved
+"""
+
+MOVE_COMMENTS_SQL = """
+    WITH moved AS (
+        DELETE FROM posts_comment WHERE {where}
+        RETURNING *
+    )
+    INSERT INTO posts_archivedcomment (id, post_id, author_id, body, created_at, deleted_at, archived_at)
+    SELECT id, post_id, author_id, body, created_at, deleted_at, %(now)s FROM moved
+    RETURNING id
+"""
+
+DELETE_POST_TAGS_SQL = """
+    DELETE FROM posts_posttag WHERE post_id = ANY(%(ids)s)
+"""
+
+
+def _repoint_reports(model, archived_model, object_ids):
+    """Point reports on moved rows at their archived copies."""
+    if not object_ids:
+        return
+    Report.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        object_id__in=object_ids
+    ).update(content_type=ContentType.objects.get_for_model(archived_model))
+
+
+def archive_posts_chunk(cutoff, now, limit):
+    """
+    Move up to `limit` posts deleted before `cutoff`, with their comments,
+    reactions and tag links. Returns (posts moved, comments moved).
+    """
+    with transaction.atomic():
+        post_ids = list(Post.objects.filter(
+            deleted_at__lt=cutoff
+        ).order_by('deleted_at').select_for_update(
+            skip_locked=True
+        ).values_list('pk', flat=True)[:limit])
+
+        if not post_ids:
+            return 0, 0
+
+        params = {'ids': post_ids, 'now': now}
+        with connection.cursor() as cursor:
+            cursor.execute(MOVE_COMMENTS_SQL.format(where='post_id = ANY(%(ids)s)'), params)
+            comment_ids = [row[0] for row in cursor.fetchall()]
+            cursor.execute(MOVE_REACTIONS_SQL, params)
+            cursor.execute(DELETE_POST_TAGS_SQL, params)
+            cursor.execute(MOVE_POSTS_SQL, params)
+
+        _repoint_reports(Comment, ArchivedComment, comment_ids)
+        _repoint_reports(Post, ArchivedPost, post_ids)
+
+    return len(post_ids), len(comment_ids)
+
+
+def archive_comments_chunk(cutoff, now, limit):
+    """
+    Move up to `limit` comments deleted before `cutoff` (on live posts).
+    Returns the number of comments moved.
+    """
+    with transaction.atomic():
+        comment_ids = list(Comment.objects.filter(
+            deleted_at__lt=cutoff
+        ).order_by('deleted_at').select_for_update(
+            skip_locked=True
+        ).values_list('pk', flat=True)[:limit])
+
+        if not comment_ids:
+            return 0
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                MOVE_COMMENTS_SQL.format(where='id = ANY(%(ids)s)'),
+                {'ids': comment_ids, 'now': now}
+            )
+
+        _repoint_reports(Comment, ArchivedComment, comment_ids)
+
+    return len(comment_ids)
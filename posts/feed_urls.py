@@ -10,4 +10,6 @@ app_name = 'feed'
 urlpatterns = [
     path('recent/', feed_views.recent_feed, name='recent'),
     path('following/', feed_views.following_feed, name='following'),
+    path('trending/', feed_views.trending_feed, name='trending'),
+    path('new/', feed_views.new_posts, name='new_posts'),
 ]
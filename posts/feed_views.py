@@ -5,16 +5,35 @@ Views for feed pages (recent and following).
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
-
-from .models import Post, Tag
+from django.http import HttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
+
+from miftah.caching import cached
+from miftah.replicas import replica_reads
+from .models import Post
+from .tag_registry import get_tags
+from .versioning import feed_etag, following_feed_etag
 from accounts.models import Follow
 
+TRENDING_LIMIT = 50
+
+# New posts polling: counts above this are shown as "N+"
+NEW_POSTS_LIMIT = 20
+LATEST_POST_CACHE_KEY = 'posts:latest_id'
+LATEST_POST_CACHE_TIMEOUT = 5
+
 
 @login_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@vary_on_headers('HX-Request')
+@condition(etag_func=feed_etag)
 def recent_feed(request):
     """Show most recent posts from all users."""
     query = request.GET.get('q', '').strip()
-    tag_filter = request.GET.getlist('tags')
+    tag_filter = [int(t) for t in request.GET.getlist('tags') if t.isdigit()]
 
     posts = Post.objects.filter(deleted_at__isnull=True)
 
@@ -26,13 +45,12 @@ def recent_feed(request):
         ).distinct()
 
     if tag_filter:
-        for tag_name in tag_filter:
-            posts = posts.filter(tags__name=tag_name)
+        posts = posts.filter(tag_ids__contains=tag_filter)
 
-    posts = posts.select_related('author', 'study_set').prefetch_related('tags').order_by('-created_at')
+    posts = posts.select_related('author', 'study_set').order_by('-created_at')
 
     # Get all tags for filter
-    all_tags = Tag.objects.all().order_by('name')
+    all_tags = get_tags()
 
     context = {
         'posts': posts,
@@ -49,10 +67,14 @@ def recent_feed(request):
 
 
 @login_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@vary_on_headers('HX-Request')
+@condition(etag_func=following_feed_etag)
 def following_feed(request):
     """Show posts from users that the current user follows."""
     query = request.GET.get('q', '').strip()
-    tag_filter = request.GET.getlist('tags')
+    tag_filter = [int(t) for t in request.GET.getlist('tags') if t.isdigit()]
 
     # Get users that current user follows
     following_users = Follow.objects.filter(
@@ -72,13 +94,12 @@ def following_feed(request):
         ).distinct()
 
     if tag_filter:
-        for tag_name in tag_filter:
-            posts = posts.filter(tags__name=tag_name)
+        posts = posts.filter(tag_ids__contains=tag_filter)
 
-    posts = posts.select_related('author', 'study_set').prefetch_related('tags').order_by('-created_at')
+    posts = posts.select_related('author', 'study_set').order_by('-created_at')
 
     # Get all tags for filter
-    all_tags = Tag.objects.all().order_by('name')
+    all_tags = get_tags()
 
     context = {
         'posts': posts,
@@ -93,3 +114,71 @@ def following_feed(request):
         return render(request, 'posts/partials/post_list.html', context)
 
     return render(request, 'posts/feed.html', context)
+
+
+@login_required
+@replica_reads
+def trending_feed(request):
+    """Show posts with the most recent activity (see posts.trending)."""
+    posts = Post.objects.filter(
+        deleted_at__isnull=True
+    ).select_related('author', 'study_set').order_by('-hot_score')[:TRENDING_LIMIT]
+
+    context = {
+        'posts': posts,
+        'feed_type': 'trending',
+    }
+
+    if request.headers.get('HX-Request'):
+        return render(request, 'posts/partials/post_list.html', context)
+
+    return render(request, 'posts/feed.html', context)
+
+
+def get_latest_post_id():
+    """
+    Highest post id, cached for a few seconds so that every client polling
+    for new posts shares a single lookup.
+    """
+    return cached(
+        LATEST_POST_CACHE_KEY,
+        lambda: Post.objects.order_by('-pk').values_list('pk', flat=True).first() or 0,
+        LATEST_POST_CACHE_TIMEOUT,
+    )
+
+
+@login_required
+@replica_reads
+def new_posts(request):
+    """
+    How many posts were published after the newest one the client has seen
+    (?since=<post id>). Polled by the recent and following feeds. Returns
+    HTMX partial, empty when there is nothing new.
+    """
+    feed_type = request.GET.get('feed', 'recent')
+    since = request.GET.get('since', '')
+    if feed_type not in ('recent', 'following') or not since.isdigit():
+        return HttpResponse('')
+    since = int(since)
+
+    # Nothing was published at all since then: answered from the cache
+    if get_latest_post_id() <= since:
+        return HttpResponse('')
+
+    posts = Post.objects.filter(pk__gt=since, deleted_at__isnull=True)
+    if feed_type == 'following':
+        posts = posts.filter(
+            author__in=Follow.objects.filter(
+                follower=request.user
+            ).values('following')
+        )
+
+    new_count = len(posts.values_list('pk', flat=True)[:NEW_POSTS_LIMIT + 1])
+    if not new_count:
+        return HttpResponse('')
+
+    return render(request, 'posts/partials/new_posts.html', {
+        'new_count': min(new_count, NEW_POSTS_LIMIT),
+        'has_more': new_count > NEW_POSTS_LIMIT,
+        'feed_type': feed_type,
+    })
@@ -3,14 +3,18 @@ Forms for creating posts and comments.
 """
 
 from django import forms
-from .models import Post, Tag, Comment
+from .models import Post, Comment
+from .tag_registry import get_tag_choices
 
 
 class PostForm(forms.ModelForm):
     """Form for creating a new post."""
 
-    tags = forms.ModelMultipleChoiceField(
-        queryset=Tag.objects.all().order_by('name'),
+    # Choices come from the tag registry, so rendering and validating
+    # the form doesn't query the tags table.
+    tags = forms.TypedMultipleChoiceField(
+        choices=get_tag_choices,
+        coerce=int,
         label='التصنيفات',
         help_text='اختر من 1 إلى 4 تصنيفات',
         widget=forms.CheckboxSelectMultiple(attrs={
@@ -0,0 +1,56 @@
+"""
+Management command to move old soft-deleted posts and comments into the
+archive tables (see posts.archive).
+Meant to run periodically (e.g. nightly from cron); safe to interrupt and
+re-run.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.archive import RETENTION, archive_comments_chunk, archive_posts_chunk
+
+
+class Command(BaseCommand):
+    help = 'Archives posts and comments that were soft-deleted before the retention window'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=RETENTION.days,
+            help='Keep deleted rows in the hot tables for this many days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts or comments to move per transaction',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        cutoff = now - timedelta(days=options['days'])
+        batch_size = options['batch_size']
+
+        posts_count = comments_count = 0
+        while True:
+            posts_moved, comments_moved = archive_posts_chunk(cutoff, now, batch_size)
+            if not posts_moved:
+                break
+            posts_count += posts_moved
+            comments_count += comments_moved
+            self.stdout.write(f'{posts_count} منشور...')
+
+        while True:
+            comments_moved = archive_comments_chunk(cutoff, now, batch_size)
+            if not comments_moved:
+                break
+            comments_count += comments_moved
+            self.stdout.write(f'{comments_count} تعليق...')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تمت أرشفة {posts_count} منشور و{comments_count} تعليق.')
+        )
@@ -0,0 +1,101 @@
+"""
+Management command to benchmark reaction toggles on a single hot post.
+Run it against a development database: it creates throwaway users and a
+post, hammers Reaction.objects.toggle() from several threads, checks the
+stored counters against the reactions table, then cleans up.
+"""
+
+import random
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from posts.models import Post, Reaction
+from study.models import StudySet
+
+USERNAME_PREFIX = 'bench_reactions_'
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks concurrent like/dislike toggles on one post'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent workers')
+        parser.add_argument('--users', type=int, default=20, help='Distinct reacting users')
+        parser.add_argument('--seconds', type=float, default=5.0, help='Benchmark duration')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        seconds = options['seconds']
+
+        if User.objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError('بيانات اختبار سابقة موجودة. احذف مستخدمي bench_reactions_ أولاً.')
+
+        users = User.objects.bulk_create([
+            User(username=f'{USERNAME_PREFIX}{i}', password='!')
+            for i in range(options['users'])
+        ])
+        try:
+            study_set = StudySet.objects.create(
+                owner=users[0], set_type='quiz', language='en', source_text='benchmark'
+            )
+            post = Post.objects.create(author=users[0], study_set=study_set, title='benchmark')
+            user_ids = [user.pk for user in users]
+
+            latencies = []
+            errors = []
+            lock = threading.Lock()
+            deadline = time.perf_counter() + seconds
+
+            def worker():
+                own_latencies = []
+                try:
+                    while time.perf_counter() < deadline:
+                        started = time.perf_counter()
+                        try:
+                            Reaction.objects.toggle(
+                                random.choice(user_ids),
+                                post.pk,
+                                random.choice(['like', 'dislike'])
+                            )
+                        except Exception as e:
+                            with lock:
+                                errors.append(e)
+                            continue
+                        own_latencies.append(time.perf_counter() - started)
+                finally:
+                    connection.close()
+                    with lock:
+                        latencies.extend(own_latencies)
+
+            workers = [threading.Thread(target=worker) for _ in range(threads)]
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+
+            post.refresh_from_db()
+            likes = Reaction.objects.filter(post=post, value='like').count()
+            dislikes = Reaction.objects.filter(post=post, value='dislike').count()
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        ops = len(latencies)
+        latencies.sort()
+        self.stdout.write(f'threads:        {threads}')
+        self.stdout.write(f'toggles:        {ops} ({ops / seconds:.0f}/s)')
+        self.stdout.write(f'errors:         {len(errors)}')
+        if latencies:
+            self.stdout.write(f'latency p50:    {statistics.median(latencies) * 1000:.2f} ms')
+            self.stdout.write(f'latency p99:    {latencies[min(ops - 1, int(ops * 0.99))] * 1000:.2f} ms')
+        self.stdout.write(f'counters:       {post.likes_count} likes, {post.dislikes_count} dislikes')
+        self.stdout.write(f'actual:         {likes} likes, {dislikes} dislikes')
+
+        if errors or (post.likes_count, post.dislikes_count) != (likes, dislikes):
+            raise CommandError('فشل الاختبار: أخطاء أو عدادات غير متطابقة.')
+
+        self.stdout.write(self.style.SUCCESS('تم الاختبار بنجاح.'))
@@ -0,0 +1,55 @@
+"""
+Management command to refresh the trending feed's hot scores.
+Meant to run periodically (e.g. every few minutes from cron).
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.utils import timezone
+
+from posts.models import Post
+from posts.trending import HALF_LIFE, active_post_ids, refresh_hot_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Refreshes hot scores for posts with new activity since the last run. '
+        'Use --full to recompute every live post (e.g. to pick up removed reactions).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute scores for all live posts',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of posts to score per batch',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+
+        if options['full']:
+            post_ids = list(Post.objects.filter(
+                deleted_at__isnull=True
+            ).values_list('pk', flat=True))
+        else:
+            # The newest stamp is when the previous run started
+            since = Post.objects.aggregate(
+                last_run=Max('hot_score_updated_at')
+            )['last_run'] or now - 7 * HALF_LIFE
+            post_ids = sorted(active_post_ids(since))
+
+        batch_size = options['batch_size']
+        updated_count = 0
+
+        for start in range(0, len(post_ids), batch_size):
+            updated_count += refresh_hot_scores(post_ids[start:start + batch_size], now=now)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'تم تحديث درجة الرواج لـ {updated_count} منشور.')
+        )
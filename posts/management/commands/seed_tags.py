@@ -4,6 +4,7 @@ Management command to seed predefined tags.
 
 from django.core.management.base import BaseCommand
 from posts.models import Tag
+from posts.tag_registry import invalidate_tags
 
 
 class Command(BaseCommand):
@@ -111,6 +112,9 @@ class Command(BaseCommand):
             else:
                 updated_count += 1
 
+        # Make every running process reload its tag registry
+        invalidate_tags()
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'تم حذف {deleted_count} تصنيف قديم، إنشاء {created_count} تصنيف جديد، وتحديث {updated_count} تصنيف موجود.'
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:39
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_add_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE posts_post p
+                SET tag_ids = COALESCE(
+                    (SELECT array_agg(pt.tag_id ORDER BY pt.tag_id)
+                     FROM posts_posttag pt WHERE pt.post_id = p.id),
+                    '{}'
+                )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('deleted_at__isnull', True)), fields=['tag_ids'], name='post_tag_ids_gin'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_add_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='dislikes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE posts_post p
+                SET likes_count = r.likes, dislikes_count = r.dislikes
+                FROM (
+                    SELECT post_id,
+                           count(*) FILTER (WHERE value = 'like') AS likes,
+                           count(*) FILTER (WHERE value = 'dislike') AS dislikes
+                    FROM posts_reaction
+                    GROUP BY post_id
+                ) r
+                WHERE r.post_id = p.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_add_post_reaction_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            sql="""
+                UPDATE posts_post p
+                SET comments_count = c.total
+                FROM (
+                    SELECT post_id, count(*) AS total
+                    FROM posts_comment
+                    WHERE deleted_at IS NULL
+                    GROUP BY post_id
+                ) c
+                WHERE c.post_id = p.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:55
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_add_post_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('post_id', models.BigIntegerField()),
+                ('body', models.TextField(verbose_name='التعليق')),
+                ('created_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'تعليق مؤرشف',
+                'verbose_name_plural': 'التعليقات المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('study_set_id', models.BigIntegerField()),
+                ('title', models.CharField(max_length=200, verbose_name='العنوان')),
+                ('caption', models.TextField(blank=True, null=True, verbose_name='وصف قصير')),
+                ('tag_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None)),
+                ('likes_count', models.PositiveIntegerField(default=0)),
+                ('dislikes_count', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('deleted_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'منشور مؤرشف',
+                'verbose_name_plural': 'المنشورات المؤرشفة',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedReaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('post_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField()),
+                ('value', models.CharField(choices=[('like', 'إعجاب'), ('dislike', 'عدم إعجاب')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'تفاعل مؤرشف',
+                'verbose_name_plural': 'التفاعلات المؤرشفة',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='comment_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='post_deleted_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='الكاتب'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='الكاتب'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_add_post_created_index'),
+    ]
+
+    operations = [
+        # Tag registry version (see posts.tag_registry). The first nextval()
+        # would return the start value without moving last_value, so it is
+        # used up here.
+        migrations.RunSQL(
+            "CREATE SEQUENCE posts_tags_version_seq; SELECT nextval('posts_tags_version_seq')",
+            reverse_sql='DROP SEQUENCE posts_tags_version_seq',
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_add_tags_version_sequence'),
+    ]
+
+    operations = [
+        # Feed ETag versions (see posts.versioning); the first nextval() is
+        # used up as in 0012.
+        migrations.RunSQL(
+            "CREATE SEQUENCE posts_version_seq; SELECT nextval('posts_version_seq')",
+            reverse_sql='DROP SEQUENCE posts_version_seq',
+        ),
+        migrations.RunSQL(
+            "CREATE SEQUENCE posts_follows_version_seq; SELECT nextval('posts_follows_version_seq')",
+            reverse_sql='DROP SEQUENCE posts_follows_version_seq',
+        ),
+    ]
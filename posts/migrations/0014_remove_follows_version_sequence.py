@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_add_feed_version_sequences'),
+    ]
+
+    operations = [
+        # Replaced by accounts.Profile.follows_version, one per user
+        migrations.RunSQL(
+            'DROP SEQUENCE posts_follows_version_seq',
+            reverse_sql=(
+                "CREATE SEQUENCE posts_follows_version_seq; "
+                "SELECT nextval('posts_follows_version_seq')"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_remove_follows_version_sequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionCounter',
+            fields=[
+                ('name', models.CharField(max_length=20, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'عداد إصدار',
+                'verbose_name_plural': 'عدادات الإصدار',
+            },
+        ),
+        # Sequence values reach a replica only every few dozen calls, so the
+        # versions move to VersionCounter rows
+        migrations.RunSQL(
+            'DROP SEQUENCE posts_version_seq; DROP SEQUENCE posts_tags_version_seq',
+            reverse_sql=(
+                "CREATE SEQUENCE posts_version_seq; SELECT nextval('posts_version_seq'); "
+                "CREATE SEQUENCE posts_tags_version_seq; "
+                "SELECT nextval('posts_tags_version_seq')"
+            ),
+        ),
+    ]
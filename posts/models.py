@@ -2,10 +2,21 @@
 Models for posts, tags, reactions, and comments.
 """
 
-from django.db import models
+from django.db import connection, models
 from django.contrib.auth.models import User
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Coalesce, Upper
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from miftah.models import DirtyFieldsMixin
 from study.models import StudySet
 
+from .tag_registry import get_tags_by_ids, get_tags_version, invalidate_tags
+from .versioning import bump_posts_version
+
 
 class Tag(models.Model):
     """
@@ -19,12 +30,16 @@ class Tag(models.Model):
         verbose_name = 'تصنيف'
         verbose_name_plural = 'التصنيفات'
         ordering = ['name']
+        indexes = [
+            # Trigram index for typeahead suggestions (name__icontains)
+            GinIndex(OpClass(Upper('name'), name='gin_trgm_ops'), name='tag_name_trgm'),
+        ]
 
     def __str__(self):
         return self.name
 
 
-class Post(models.Model):
+class Post(DirtyFieldsMixin):
     """
     A post sharing a study set.
     Posts are soft-deleted (deleted_at).
@@ -53,6 +68,21 @@ class Post(models.Model):
         related_name='posts',
         verbose_name='الوسوم'
     )
+    # Denormalized copy of the post's tag ids, kept in sync from PostTag
+    # writes so multi-tag filters are a single indexed containment query.
+    tag_ids = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False)
+    # Time-decayed activity score for the trending feed (see posts.trending),
+    # refreshed by the refresh_trending command.
+    hot_score = models.FloatField(default=0, editable=False)
+    hot_score_updated_at = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    # Stored reaction counters, maintained by Reaction.objects.toggle()
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    dislikes_count = models.PositiveIntegerField(default=0, editable=False)
+    # Stored count of live comments, maintained by comment signals and
+    # Comment.soft_delete()
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Bumped by every write that changes the post card (see card_version)
+    version = models.PositiveIntegerField(default=1, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     deleted_at = models.DateTimeField(null=True, blank=True)
 
@@ -60,21 +90,86 @@ class Post(models.Model):
         verbose_name = 'منشور'
         verbose_name_plural = 'المنشورات'
         ordering = ['-created_at']
+        indexes = [
+            # Recent feed / search: live posts, newest first
+            models.Index(
+                fields=['-created_at'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='post_live_recent_idx',
+            ),
+            # Profile and following feed: an author's live posts, newest first
+            models.Index(
+                fields=['author', '-created_at'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='post_live_author_idx',
+            ),
+            # Trigram index for typeahead suggestions (title__icontains), live posts only
+            GinIndex(
+                OpClass(Upper('title'), name='gin_trgm_ops'),
+                condition=models.Q(deleted_at__isnull=True),
+                name='post_title_trgm',
+            ),
+            # Tag filtering (tag_ids @> [...]), live posts only
+            GinIndex(
+                fields=['tag_ids'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='post_tag_ids_gin',
+            ),
+            # Trending feed (top-K by hot_score), live posts only
+            models.Index(
+                fields=['-hot_score'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='post_hot_score_idx',
+            ),
+            # Daily rollups (see admin_panel.rollups), deleted posts included
+            models.Index(fields=['created_at'], name='post_created_idx'),
+            # Archival job: deleted posts past the retention window
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='post_deleted_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # A save that writes nothing (see DirtyFieldsMixin) keeps the version.
+        # It is incremented in the database, as a stale instance would
+        # otherwise write a version that was already used.
+        bump_version = not self._state.adding and (
+            kwargs.get('update_fields') is not None or self.get_dirty_fields()
+        )
+        if bump_version:
+            self.version = models.F('version') + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'version'}
+        super().save(*args, **kwargs)
+        if bump_version:
+            # Deferred: the new value is only read if something uses it
+            del self.version
+            self._loaded_values.pop('version', None)
+
     @property
     def is_deleted(self):
         return self.deleted_at is not None
 
     @property
-    def likes_count(self):
-        return self.reactions.filter(value='like').count()
+    def card_version(self):
+        """Cache version of the post card: the post itself and the tags it shows."""
+        return f'{self.version}.{get_tags_version()}'
+
+    def soft_delete(self):
+        """Mark the post as deleted. Returns False if it already was."""
+        deleted = soft_delete_posts([self.pk])
+        self.deleted_at = self.deleted_at or timezone.now()
+        return bool(deleted)
 
     @property
-    def dislikes_count(self):
-        return self.reactions.filter(value='dislike').count()
+    def tag_list(self):
+        """The post's tags, resolved from the tag registry without a query."""
+        return get_tags_by_ids(self.tag_ids)
 
     def get_user_reaction(self, user):
         """Get user's reaction to this post, if any."""
@@ -93,6 +188,77 @@ class PostTag(models.Model):
         unique_together = ('post', 'tag')
 
 
+class ReactionManager(models.Manager):
+
+    # Toggle a reaction and adjust the post's counters in one statement:
+    # - same reaction exists      -> delete it
+    # - other reaction exists     -> switch it (ON CONFLICT ... DO UPDATE)
+    # - no reaction               -> insert it
+    # Concurrent toggles by the same user serialize on the reaction row and
+    # the unique constraint instead of failing with an IntegrityError.
+    TOGGLE_SQL = """
+        WITH post AS (
+            SELECT id FROM posts_post
+            WHERE id = %(post_id)s AND deleted_at IS NULL
+        ),
+        removed AS (
+            DELETE FROM posts_reaction
+            WHERE user_id = %(user_id)s
+              AND post_id IN (SELECT id FROM post)
+              AND value = %(value)s
+            RETURNING 1
+        ),
+        added AS (
+            INSERT INTO posts_reaction (user_id, post_id, value, created_at)
+            SELECT %(user_id)s, id, %(value)s, %(now)s FROM post
+            WHERE NOT EXISTS (SELECT 1 FROM removed)
+            ON CONFLICT (user_id, post_id) DO UPDATE SET value = EXCLUDED.value
+            WHERE posts_reaction.value <> EXCLUDED.value
+            RETURNING (xmax = 0) AS inserted
+        ),
+        delta AS (
+            SELECT
+                (SELECT count(*) FROM added) - (SELECT count(*) FROM removed) AS same,
+                -(SELECT count(*) FROM added WHERE NOT inserted) AS other
+        ),
+        counts AS (
+            UPDATE posts_post SET
+                likes_count = likes_count
+                    + CASE WHEN %(value)s = 'like' THEN delta.same ELSE delta.other END,
+                dislikes_count = dislikes_count
+                    + CASE WHEN %(value)s = 'like' THEN delta.other ELSE delta.same END,
+                version = version + 1
+            FROM delta
+            WHERE posts_post.id IN (SELECT id FROM post)
+            RETURNING likes_count, dislikes_count
+        )
+        SELECT
+            CASE WHEN EXISTS (SELECT 1 FROM removed) THEN NULL ELSE %(value)s END,
+            likes_count,
+            dislikes_count
+        FROM counts
+    """
+
+    def toggle(self, user_id, post_id, value):
+        """
+        Toggle user's reaction on a live post.
+
+        Returns (user_reaction, likes_count, dislikes_count) after the
+        toggle, or None if the post doesn't exist or is deleted.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(self.TOGGLE_SQL, {
+                'user_id': user_id,
+                'post_id': post_id,
+                'value': value,
+                'now': timezone.now(),
+            })
+            result = cursor.fetchone()
+        if result:
+            bump_posts_version()
+        return result
+
+
 class Reaction(models.Model):
     """
     User reaction to a post (like or dislike).
@@ -116,13 +282,19 @@ class Reaction(models.Model):
     value = models.CharField(max_length=10, choices=VALUE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ReactionManager()
+
     class Meta:
         verbose_name = 'تفاعل'
         verbose_name_plural = 'التفاعلات'
         unique_together = ('user', 'post')
+        indexes = [
+            # New activity scan in refresh_trending
+            models.Index(fields=['created_at'], name='reaction_created_idx'),
+        ]
 
 
-class Comment(models.Model):
+class Comment(DirtyFieldsMixin):
     """
     Simple comment on a post.
     No replies or reactions on comments.
@@ -145,6 +317,22 @@ class Comment(models.Model):
         verbose_name = 'تعليق'
         verbose_name_plural = 'التعليقات'
         ordering = ['-created_at']
+        indexes = [
+            # Post detail: a post's live comments, newest first
+            models.Index(
+                fields=['post', '-created_at'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='comment_live_post_idx',
+            ),
+            # New activity scan in refresh_trending
+            models.Index(fields=['created_at'], name='comment_created_idx'),
+            # Archival job: deleted comments past the retention window
+            models.Index(
+                fields=['deleted_at'],
+                condition=models.Q(deleted_at__isnull=False),
+                name='comment_deleted_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.author.username}: {self.body[:30]}'
@@ -152,3 +340,242 @@ class Comment(models.Model):
     @property
     def is_deleted(self):
         return self.deleted_at is not None
+
+    def soft_delete(self):
+        """Mark the comment as deleted. Returns False if it already was."""
+        deleted = soft_delete_comments([self.pk])
+        self.deleted_at = self.deleted_at or timezone.now()
+        return bool(deleted)
+
+
+class ArchivedPost(models.Model):
+    """
+    A soft-deleted post moved out of the hot posts table by the
+    archive_deleted command (see posts.archive). Keeps the original id,
+    so reports on the post still resolve.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='الكاتب'
+    )
+    study_set_id = models.BigIntegerField()
+    title = models.CharField(max_length=200, verbose_name='العنوان')
+    caption = models.TextField(blank=True, null=True, verbose_name='وصف قصير')
+    tag_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    dislikes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    deleted_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'منشور مؤرشف'
+        verbose_name_plural = 'المنشورات المؤرشفة'
+
+    def __str__(self):
+        return self.title
+
+
+class ArchivedComment(models.Model):
+    """
+    A comment moved out of the hot comments table, either soft-deleted
+    itself or on an archived post. Keeps the original id.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    post_id = models.BigIntegerField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='الكاتب'
+    )
+    body = models.TextField(verbose_name='التعليق')
+    created_at = models.DateTimeField()
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'تعليق مؤرشف'
+        verbose_name_plural = 'التعليقات المؤرشفة'
+
+    def __str__(self):
+        return f'{self.author.username}: {self.body[:30]}'
+
+
+class ArchivedReaction(models.Model):
+    """A reaction on an archived post."""
+    id = models.BigIntegerField(primary_key=True)
+    post_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    value = models.CharField(max_length=10, choices=Reaction.VALUE_CHOICES)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'تفاعل مؤرشف'
+        verbose_name_plural = 'التفاعلات المؤرشفة'
+
+
+class VersionCounter(models.Model):
+    """
+    A named version counter, moved by posts.versioning.bump_version().
+    Rows are updated in place, so unlike sequence values they replicate
+    exactly: a replica serves the versions of the rows it serves.
+    """
+    name = models.CharField(max_length=20, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'عداد إصدار'
+        verbose_name_plural = 'عدادات الإصدار'
+
+    def __str__(self):
+        return f'{self.name}: {self.value}'
+
+
+def soft_delete_posts(post_ids):
+    """Mark the given live posts as deleted. Returns the number deleted."""
+    deleted = Post.objects.filter(pk__in=post_ids, deleted_at__isnull=True).update(
+        deleted_at=timezone.now(),
+        version=models.F('version') + 1
+    )
+    if deleted:
+        bump_posts_version()
+    return deleted
+
+
+# Delete comments and uncount them from their posts in one statement
+SOFT_DELETE_COMMENTS_SQL = """
+    WITH deleted AS (
+        UPDATE posts_comment SET deleted_at = %(now)s
+        WHERE id = ANY(%(ids)s) AND deleted_at IS NULL
+        RETURNING post_id
+    ),
+    per_post AS (
+        SELECT post_id, count(*) AS total FROM deleted GROUP BY post_id
+    ),
+    updated AS (
+        UPDATE posts_post SET
+            comments_count = comments_count - per_post.total,
+            version = version + 1
+        FROM per_post
+        WHERE posts_post.id = per_post.post_id
+    )
+    SELECT coalesce(sum(total), 0) FROM per_post
+"""
+
+
+def soft_delete_comments(comment_ids):
+    """Mark the given live comments as deleted. Returns the number deleted."""
+    with connection.cursor() as cursor:
+        cursor.execute(SOFT_DELETE_COMMENTS_SQL, {
+            'ids': list(comment_ids),
+            'now': timezone.now(),
+        })
+        deleted = cursor.fetchone()[0]
+    if deleted:
+        bump_posts_version()
+    return deleted
+
+
+def sync_post_tag_ids(post_ids):
+    """Rebuild Post.tag_ids from PostTag rows for the given posts."""
+    tag_ids = PostTag.objects.filter(
+        post=models.OuterRef('pk')
+    ).values('post').annotate(
+        ids=ArrayAgg('tag_id', ordering='tag_id')
+    ).values('ids')
+
+    Post.objects.filter(pk__in=post_ids).update(
+        tag_ids=Coalesce(
+            models.Subquery(tag_ids),
+            models.Value([], output_field=ArrayField(models.BigIntegerField()))
+        ),
+        version=models.F('version') + 1
+    )
+    bump_posts_version()
+
+
+# Signals to move the feed version tokens (see posts.versioning)
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_posts_version_on_post_change(sender, **kwargs):
+    """Any post write may change what the feeds show."""
+    bump_posts_version()
+
+
+# Signal to refresh the process-local tag registry when tags change
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    """Bump the tag registry version on any tag write."""
+    invalidate_tags()
+
+
+# Signal to keep reaction counters right when reactions are deleted outside
+# Reaction.objects.toggle() (e.g. cascading from a deleted user)
+@receiver(post_delete, sender=Reaction)
+def decrement_reaction_count(sender, instance, **kwargs):
+    """Decrement the post's counter for a deleted reaction."""
+    field = 'likes_count' if instance.value == 'like' else 'dislikes_count'
+    Post.objects.filter(pk=instance.post_id).update(**{
+        field: models.F(field) - 1,
+        'version': models.F('version') + 1,
+    })
+    bump_posts_version()
+
+
+# Signals to keep Post.comments_count in sync with live comments
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, **kwargs):
+    """Count a newly created comment."""
+    if created and instance.deleted_at is None:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=models.F('comments_count') + 1,
+            version=models.F('version') + 1
+        )
+        bump_posts_version()
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    """Uncount a live comment that was hard-deleted (e.g. by a cascade)."""
+    if instance.deleted_at is None:
+        Post.objects.filter(pk=instance.post_id).update(
+            comments_count=models.F('comments_count') - 1,
+            version=models.F('version') + 1
+        )
+        bump_posts_version()
+
+
+# Signals to keep Post.tag_ids in sync with PostTag writes
+@receiver(m2m_changed, sender=PostTag)
+def sync_tag_ids_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Sync tag_ids after post.tags / tag.posts add, remove or clear."""
+    if action == 'pre_clear' and reverse:
+        # tag.posts.clear() doesn't report which posts were affected
+        instance._cleared_post_ids = list(instance.posts.values_list('pk', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        post_ids = [instance.pk]
+    elif action == 'post_clear':
+        post_ids = instance.__dict__.pop('_cleared_post_ids', [])
+    else:
+        post_ids = pk_set
+
+    sync_post_tag_ids(post_ids)
+
+
+@receiver(post_save, sender=PostTag)
+@receiver(post_delete, sender=PostTag)
+def sync_tag_ids_on_post_tag_change(sender, instance, **kwargs):
+    """Sync tag_ids when a PostTag row is written directly or cascade-deleted."""
+    sync_post_tag_ids([instance.post_id])
@@ -0,0 +1,79 @@
+"""
+Process-local registry of tags.
+
+Tags are a small table that almost never changes, so each process keeps
+them in memory. Every tag write moves the shared tags version (see
+posts.versioning), including writes from management commands such as
+seed_tags. A process compares it with the value it loaded at most every
+TAGS_CHECK_SECONDS, and reloads its copy only when it has moved.
+"""
+
+import threading
+import time
+
+from .versioning import TAGS, bump_version, get_version
+
+TAGS_CHECK_SECONDS = 2
+
+_lock = threading.Lock()
+_version = None
+_checked_at = None
+_tags = []
+_tags_by_id = {}
+
+
+def _load():
+    """Reload tags from the database if the shared version has moved."""
+    global _version, _checked_at, _tags, _tags_by_id
+
+    now = time.monotonic()
+    if _checked_at is not None and now - _checked_at < TAGS_CHECK_SECONDS:
+        return
+
+    with _lock:
+        if _checked_at is not None and now - _checked_at < TAGS_CHECK_SECONDS:
+            return
+        version = get_version(TAGS)
+        if version != _version:
+            from .models import Tag
+            tags = list(Tag.objects.order_by('name'))
+            _tags = tags
+            _tags_by_id = {tag.pk: tag for tag in tags}
+            _version = version
+        _checked_at = now
+
+
+def get_tags_version():
+    """Token that changes whenever any tag is written."""
+    _load()
+    return _version
+
+
+def get_tags():
+    """All tags ordered by name."""
+    _load()
+    return list(_tags)
+
+
+def get_tags_by_ids(tag_ids):
+    """Tags with the given ids, ordered by name. Unknown ids are skipped."""
+    _load()
+    wanted = set(tag_ids)
+    return [tag for tag in _tags if tag.pk in wanted]
+
+
+def get_tag_choices():
+    """(id, name) pairs for form choice fields."""
+    _load()
+    return [(tag.pk, tag.name) for tag in _tags]
+
+
+def invalidate_tags():
+    """Mark every process's copy of the registry as stale."""
+    global _version, _checked_at
+
+    # This process reloads at once, even before the write commits
+    with _lock:
+        _version = None
+        _checked_at = None
+    bump_version(TAGS)
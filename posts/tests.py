@@ -0,0 +1,758 @@
+"""
+Tests for hot views: query-plan regressions, conditional responses and
+denormalized counters.
+
+For the query-plan tests, the database is seeded with a large volume of
+"cold" rows (deleted posts, other users' comments, follows and resolved
+reports) next to a small live slice for the viewer, so the planner has a
+real choice between indexes and full scans. Each hot view is requested
+and every SELECT it ran is EXPLAINed; a sequential scan on a large
+table, or a sort of more than a handful of rows, fails the test.
+"""
+
+import hashlib
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Follow, Profile
+from accounts.suggestions import refresh_suggestions
+from admin_panel.models import Report
+from admin_panel.stats import get_dashboard_stats
+from miftah.replicas import REPLICA, REPLICA_LAG_KEY
+from study.models import StudySet
+from . import tag_registry, versioning
+from .archive import RETENTION, archive_posts_chunk
+from .models import (
+    ArchivedComment, ArchivedPost, ArchivedReaction, Comment, Post, Reaction, Tag,
+)
+from .tag_registry import get_tags
+from .views import COMMENTS_PAGE_SIZE, get_comments_page
+
+COLD_USERS = 5000
+COLD_ROWS = 10000
+LIVE_POSTS = 20
+
+LARGE_TABLES = {
+    'auth_user',
+    'study_studyset',
+    'posts_post',
+    'posts_reaction',
+    'posts_comment',
+    'accounts_profile',
+    'accounts_follow',
+    'accounts_followsuggestion',
+    'admin_panel_report',
+}
+
+# Sorting a few rows fetched through an index is fine; sorting a table isn't
+SORT_ROWS_LIMIT = 100
+
+
+class HotQueryPlanTests(TestCase):
+    """EXPLAIN every query of the hot views against a seeded database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+
+        cls.viewer = User.objects.create_user('viewer', password='pass', is_staff=True)
+        users = User.objects.bulk_create([
+            User(username=f'user{i}', password='!') for i in range(COLD_USERS)
+        ])
+        # Varied search text, so trigrams are as selective as on real names
+        Profile.objects.bulk_create([
+            Profile(
+                user=user, search_text=hashlib.md5(user.username.encode()).hexdigest()
+            )
+            for user in users
+        ])
+
+        study_sets = StudySet.objects.bulk_create([
+            StudySet(
+                owner=users[i % COLD_USERS],
+                set_type='flashcards',
+                language='ar',
+                source_text='نص',
+            )
+            for i in range(COLD_ROWS)
+        ])
+        cls.study_set = StudySet.objects.create(
+            owner=cls.viewer, set_type='quiz', language='ar', source_text='نص'
+        )
+
+        cls.tag = Tag.objects.create(name='فيزياء')
+
+        # Cold: soft-deleted posts, with reactions, comments and resolved
+        # reports
+        cold_posts = Post.objects.bulk_create([
+            Post(
+                author=users[i % COLD_USERS],
+                study_set=study_sets[i],
+                title=f'منشور {i}',
+                deleted_at=now,
+            )
+            for i in range(COLD_ROWS)
+        ])
+        Reaction.objects.bulk_create([
+            Reaction(user=users[i % COLD_USERS], post=post, value='like')
+            for i, post in enumerate(cold_posts)
+        ])
+        Comment.objects.bulk_create([
+            Comment(post=post, author=users[i % COLD_USERS], body='تعليق')
+            for i, post in enumerate(cold_posts)
+        ])
+        post_type = ContentType.objects.get_for_model(Post)
+        Report.objects.bulk_create([
+            Report(
+                reporter=users[i % COLD_USERS],
+                content_type=post_type,
+                object_id=post.pk,
+                reason='spam',
+                status='dismissed',
+            )
+            for i, post in enumerate(cold_posts)
+        ])
+        Follow.objects.bulk_create([
+            Follow(follower=users[i], following=users[(i + k) % COLD_USERS])
+            for i in range(COLD_USERS)
+            for k in range(1, 4)
+        ])
+
+        # Live slice the viewer actually sees
+        live_posts = [
+            Post.objects.create(
+                author=users[i % 10],
+                study_set=study_sets[i],
+                title=f'منشور حي {i}',
+            )
+            for i in range(LIVE_POSTS)
+        ]
+        cls.post = live_posts[0]
+        cls.post.tags.add(cls.tag)
+        Comment.objects.create(post=cls.post, author=users[1], body='تعليق')
+        Reaction.objects.create(user=cls.viewer, post=cls.post, value='like')
+        Report.objects.create(
+            reporter=users[2], content_type=post_type, object_id=cls.post.pk,
+            reason='spam'
+        )
+        Follow.objects.bulk_create(
+            [Follow(follower=cls.viewer, following=user) for user in users[:10]]
+            + [Follow(follower=user, following=cls.viewer) for user in users[10:15]]
+        )
+        cls.author = users[0]
+        refresh_suggestions([cls.viewer.pk] + [user.pk for user in users], now)
+
+        with connection.cursor() as cursor:
+            # Merge the rows bulk-inserted above into the GIN index, as
+            # autovacuum would
+            cursor.execute("SELECT gin_clean_pending_list('profile_search_trgm')")
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+            return cursor.fetchone()[0][0]['Plan']
+
+    def plan_problems(self, plan):
+        """Seq scans on large tables and big sorts anywhere in the plan."""
+        problems = []
+        node_type = plan['Node Type']
+
+        if node_type == 'Seq Scan' and plan['Relation Name'] in LARGE_TABLES:
+            problems.append(f"Seq Scan on {plan['Relation Name']}")
+        is_sort = node_type in ('Sort', 'Incremental Sort')
+        if is_sort and plan['Plan Rows'] > SORT_ROWS_LIMIT:
+            problems.append(f"{node_type} of {plan['Plan Rows']} rows")
+
+        for child in plan.get('Plans', []):
+            problems.extend(self.plan_problems(child))
+        return problems
+
+    def assertEfficientPlans(self, url, **extra):
+        """Request url and check the plan of every SELECT it ran."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            problems = self.plan_problems(self.explain(sql))
+            self.assertFalse(problems, f'{url}: {problems}\n{sql}')
+
+    def test_recent_feed(self):
+        self.assertEfficientPlans(reverse('feed:recent'))
+
+    def test_recent_feed_tag_filter(self):
+        self.assertEfficientPlans(reverse('feed:recent') + f'?tags={self.tag.pk}')
+
+    def test_following_feed(self):
+        self.assertEfficientPlans(reverse('feed:following'))
+
+    def test_trending_feed(self):
+        self.assertEfficientPlans(reverse('feed:trending'))
+
+    def test_new_posts_following(self):
+        self.assertEfficientPlans(
+            reverse('feed:new_posts') + f'?feed=following&since={self.post.pk - 1}'
+        )
+
+    def test_search_tag_filter(self):
+        self.assertEfficientPlans(reverse('posts:search') + f'?tags={self.tag.pk}')
+
+    def test_post_detail(self):
+        self.assertEfficientPlans(reverse('posts:detail', args=[self.post.pk]))
+
+    def test_profile(self):
+        self.assertEfficientPlans(
+            reverse('accounts:profile', args=[self.author.username])
+        )
+
+    def test_following_list(self):
+        self.assertEfficientPlans(reverse('accounts:following_list'))
+
+    def test_followers_list(self):
+        self.assertEfficientPlans(
+            reverse('accounts:followers_list', args=[self.author.username])
+        )
+
+    def test_search_users(self):
+        query = hashlib.md5(b'user123').hexdigest()[:10]
+        self.assertEfficientPlans(reverse('accounts:search') + f'?q={query}')
+
+    def test_follow_suggestions(self):
+        self.assertEfficientPlans(reverse('accounts:suggestions'))
+
+    def test_study_history(self):
+        self.assertEfficientPlans(reverse('study:history'))
+
+    def test_reports_queue(self):
+        # The dashboard statistics (pending reports badge) are cached
+        get_dashboard_stats()
+        self.assertEfficientPlans(reverse('admin_panel:reports_list'))
+
+    def test_moderation_queue(self):
+        get_dashboard_stats()
+        self.assertEfficientPlans(reverse('admin_panel:moderation_queue'))
+
+
+class FeedETagTests(TestCase):
+    """Unchanged feeds are answered with 304 Not Modified."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user('viewer', password='pass')
+        cls.author = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=cls.author, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, study_set=study_set, title='منشور'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.viewer)
+
+    def get_etag(self, url):
+        # The first response sets the CSRF cookie, which is part of the ETag
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_feed_is_not_modified(self):
+        for name in ('feed:recent', 'feed:following', 'posts:search'):
+            url = reverse(name)
+            etag = self.get_etag(url)
+            # user (the session is cached) and the versions
+            with self.assertNumQueries(2):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+
+    def test_write_from_another_process_changes_etag(self):
+        url = reverse('feed:recent')
+        etag = self.get_etag(url)
+        # What purge_deleted or another worker does; no cache is involved
+        versioning.bump_version(versioning.POSTS, on_commit=False)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_reaction_changes_etag(self):
+        url = reverse('feed:recent')
+        etag = self.get_etag(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Reaction.objects.toggle(self.viewer.pk, self.post.pk, 'like')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_follow_changes_following_feed_etag(self):
+        url = reverse('feed:following')
+        etag = self.get_etag(url)
+        Follow.objects.create(follower=self.viewer, following=self.author)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.get_etag(url)
+        self.client.post(reverse('accounts:toggle_follow', args=[self.author.username]))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_follows_only_change_the_followers_following_feed(self):
+        etags = {
+            name: self.get_etag(reverse(name))
+            for name in ('feed:recent', 'feed:following', 'posts:search')
+        }
+        other = User.objects.create_user('other', password='pass')
+        Follow.objects.create(follower=other, following=self.author)
+        Follow.objects.create(follower=self.viewer, following=other)
+
+        # The viewer's own follow changes only their following feed
+        for name, etag in etags.items():
+            response = self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+            expected = 200 if name == 'feed:following' else 304
+            self.assertEqual(response.status_code, expected, name)
+
+        # A third party's follow changes none of them
+        url = reverse('feed:following')
+        etag = self.get_etag(url)
+        Follow.objects.create(follower=other, following=self.viewer)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_new_post_is_polled_at_once(self):
+        url = reverse('feed:new_posts') + f'?since={self.post.pk}'
+        # Caches the latest id
+        self.assertEqual(self.client.get(url).content, b'')
+
+        tag = Tag.objects.create(name='رياضيات')
+        self.client.force_login(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('posts:create'), {
+                'title': 'جديد', 'study_set': self.post.study_set_id, 'tags': [tag.pk],
+            })
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.viewer)
+        self.assertContains(self.client.get(url), '1')
+
+
+class SearchSuggestionTests(TestCase):
+    """Typeahead suggestions for the search box."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', password='pass')
+        study_set = StudySet.objects.create(
+            owner=cls.user, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.post = Post.objects.create(
+            author=cls.user, study_set=study_set, title='مقدمة في الفيزياء'
+        )
+        cls.tag = Tag.objects.create(name='فيزياء')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_short_query_skips_search(self):
+        with self.assertNumQueries(1):  # user
+            response = self.client.get(reverse('posts:suggest'), {'q': ' ف '})
+        self.assertEqual(response.json(), {'posts': [], 'tags': []})
+
+    def test_matches_titles_and_tags(self):
+        url = reverse('posts:suggest')
+        data = self.client.get(url, {'q': 'فيزياء'}).json()
+        self.assertEqual([post['pk'] for post in data['posts']], [self.post.pk])
+        self.assertEqual([tag['pk'] for tag in data['tags']], [self.tag.pk])
+
+        # The same query, however it is spaced, is answered from the cache
+        with self.assertNumQueries(1):  # user
+            cached_data = self.client.get(url, {'q': '  فيزياء '}).json()
+        self.assertEqual(cached_data, data)
+
+
+class TagIdsSyncTests(TestCase):
+    """Post.tag_ids follows every way a post's tags can change."""
+
+    def setUp(self):
+        user = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=user, set_type='quiz', language='ar', source_text='نص'
+        )
+        self.post = Post.objects.create(author=user, study_set=study_set, title='منشور')
+        self.physics = Tag.objects.create(name='فيزياء')
+        self.chemistry = Tag.objects.create(name='كيمياء')
+
+    def tag_ids(self):
+        self.post.refresh_from_db(fields=['tag_ids'])
+        return sorted(self.post.tag_ids)
+
+    def test_set_and_clear(self):
+        self.post.tags.set([self.physics, self.chemistry])
+        self.assertEqual(self.tag_ids(), sorted([self.physics.pk, self.chemistry.pk]))
+
+        self.post.tags.set([self.chemistry])
+        self.assertEqual(self.tag_ids(), [self.chemistry.pk])
+
+        self.post.tags.clear()
+        self.assertEqual(self.tag_ids(), [])
+
+    def test_reverse_clear_and_tag_delete(self):
+        self.post.tags.set([self.physics, self.chemistry])
+        self.physics.posts.clear()
+        self.assertEqual(self.tag_ids(), [self.chemistry.pk])
+
+        self.chemistry.delete()
+        self.assertEqual(self.tag_ids(), [])
+
+    def test_tag_filter_uses_tag_ids(self):
+        self.post.tags.set([self.physics])
+        self.assertQuerySetEqual(
+            Post.objects.filter(tag_ids__contains=[self.physics.pk]), [self.post]
+        )
+        self.assertFalse(
+            Post.objects.filter(tag_ids__contains=[self.chemistry.pk]).exists()
+        )
+
+
+class TagRegistryTests(TestCase):
+    """Tag writes from any process reach every process's tag registry."""
+
+    def test_reloads_when_another_process_writes(self):
+        get_tags()
+        # Another process: rows written without this process's signals,
+        # then the shared version advanced
+        Tag.objects.bulk_create([Tag(name='فلك')])
+        with mock.patch.object(tag_registry, 'TAGS_CHECK_SECONDS', 0):
+            self.assertNotIn('فلك', [tag.name for tag in get_tags()])
+            versioning.bump_version(versioning.TAGS, on_commit=False)
+            self.assertIn('فلك', [tag.name for tag in get_tags()])
+
+    def test_seed_tags_advances_the_shared_version(self):
+        before = versioning.get_version(versioning.TAGS)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('seed_tags', stdout=io.StringIO())
+        after = versioning.get_version(versioning.TAGS)
+        self.assertGreater(int(after), int(before))
+        self.assertIn('فلك', [tag.name for tag in get_tags()])
+
+
+class HotScoreRefreshTests(TestCase):
+    """refresh_trending rescores active posts, or all live ones with --full."""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author', password='pass')
+        self.fan = User.objects.create_user('fan', password='pass')
+        study_set = StudySet.objects.create(
+            owner=self.author, set_type='quiz', language='ar', source_text='نص'
+        )
+        self.liked, self.quiet = [
+            Post.objects.create(author=self.author, study_set=study_set, title=title)
+            for title in ('محبوب', 'هادئ')
+        ]
+        Post.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+    def refresh(self, *args):
+        out = io.StringIO()
+        call_command('refresh_trending', *args, stdout=out)
+        return out.getvalue()
+
+    def scores(self):
+        return dict(Post.objects.values_list('pk', 'hot_score'))
+
+    def test_incremental_and_full(self):
+        self.assertIn(' 2 ', self.refresh('--full'))
+        before = self.scores()
+
+        Reaction.objects.toggle(self.fan.pk, self.liked.pk, 'like')
+        self.assertIn(' 1 ', self.refresh())
+        after_like = self.scores()
+        self.assertGreater(after_like[self.liked.pk], before[self.liked.pk])
+        self.assertEqual(after_like[self.quiet.pk], before[self.quiet.pk])
+
+        # Removing a reaction leaves no new activity, so only --full sees it
+        Reaction.objects.toggle(self.fan.pk, self.liked.pk, 'like')
+        self.assertIn(' 0 ', self.refresh())
+        self.assertEqual(self.scores(), after_like)
+        self.refresh('--full')
+        self.assertLess(self.scores()[self.liked.pk], after_like[self.liked.pk])
+
+
+class CommentPaginationTests(TestCase):
+    """Comments are paged by cursor and counted on the post."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('author', password='pass')
+        study_set = StudySet.objects.create(
+            owner=self.user, set_type='quiz', language='ar', source_text='نص'
+        )
+        self.post = Post.objects.create(
+            author=self.user, study_set=study_set, title='منشور'
+        )
+        self.comments = [
+            Comment.objects.create(post=self.post, author=self.user, body=f'تعليق {i}')
+            for i in range(COMMENTS_PAGE_SIZE + 5)
+        ]
+        self.client.force_login(self.user)
+
+    def test_pages_cover_every_comment_once(self):
+        first, cursor = get_comments_page(self.post.pk)
+        self.assertEqual(len(first), COMMENTS_PAGE_SIZE)
+
+        response = self.client.get(
+            reverse('posts:comments', args=[self.post.pk]), {'after': cursor}
+        )
+        second = response.context['comments']
+        self.assertIsNone(response.context['next_cursor'])
+
+        newest_first = [comment.pk for comment in reversed(self.comments)]
+        self.assertEqual([comment.pk for comment in [*first, *second]], newest_first)
+
+    def test_soft_delete_uncounts_once(self):
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, COMMENTS_PAGE_SIZE + 5)
+
+        comment = self.comments[0]
+        self.client.post(reverse('posts:delete_comment', args=[comment.pk]))
+        # Already deleted: nothing to uncount
+        self.assertFalse(comment.soft_delete())
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, COMMENTS_PAGE_SIZE + 4)
+        comments, _ = get_comments_page(self.post.pk)
+        self.assertNotIn(comment.pk, [c.pk for c in comments])
+
+
+class DirtyFieldsTests(TestCase):
+    """Saves write only the fields that changed."""
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', password='pass')
+
+    def test_login_issues_no_profile_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('accounts:login'), {'username': 'viewer', 'password': 'pass'}
+            )
+        self.assertEqual(response.status_code, 302)
+        profile_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'accounts_profile' in query['sql']
+        ]
+        self.assertEqual(profile_queries, [])
+
+    def test_save_writes_changed_fields_only(self):
+        study_set = StudySet.objects.create(
+            owner=self.user, set_type='quiz', language='ar', source_text='نص'
+        )
+        post = Post.objects.create(author=self.user, study_set=study_set, title='منشور')
+        post = Post.objects.get(pk=post.pk)
+
+        with self.assertNumQueries(0):
+            post.save()
+
+        post.caption = 'وصف'
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+        update = queries.captured_queries[0]['sql']
+        self.assertIn('"caption"', update)
+        self.assertIn('"version"', update)
+        self.assertNotIn('"title"', update)
+
+
+class PostCardCacheTests(TestCase):
+    """Cached post cards are keyed on the post's version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.viewer = User.objects.create_user('viewer', password='pass')
+        study_set = StudySet.objects.create(
+            owner=cls.viewer, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.post = Post.objects.create(
+            author=cls.viewer, study_set=study_set, title='منشور'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.viewer)
+
+    def card_key(self):
+        post = Post.objects.select_related('author').get(pk=self.post.pk)
+        return make_template_fragment_key(
+            'post_card', [post.pk, post.card_version, post.author.username]
+        )
+
+    def test_reaction_changes_card_cache_key(self):
+        self.client.get(reverse('feed:recent'))
+        key = self.card_key()
+        self.assertIsNotNone(cache.get(key))
+
+        Reaction.objects.toggle(self.viewer.pk, self.post.pk, 'like')
+        new_key = self.card_key()
+        self.assertNotEqual(new_key, key)
+        self.assertIsNone(cache.get(new_key))
+        self.client.get(reverse('feed:recent'))
+        self.assertIsNotNone(cache.get(new_key))
+
+    def test_stale_instance_does_not_reuse_version(self):
+        first = Post.objects.get(pk=self.post.pk)
+        stale = Post.objects.get(pk=self.post.pk)
+        first.caption = 'وصف'
+        first.save()
+        first_version = first.version
+        stale.title = 'عنوان'
+        # Just the UPDATE: the new version is read when it is used
+        with self.assertNumQueries(1):
+            stale.save()
+        self.assertEqual(stale.version, first_version + 1)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).version, stale.version)
+
+
+class ArchiveTests(TestCase):
+    """Old deleted content moves to the archive tables, in resumable chunks."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author', password='pass')
+        cls.reporter = User.objects.create_user('reporter', password='pass')
+        study_set = StudySet.objects.create(
+            owner=cls.author, set_type='quiz', language='ar', source_text='نص'
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, study_set=study_set, title=f'منشور {i}'
+            )
+            for i in range(3)
+        ]
+        cls.live_post = Post.objects.create(
+            author=cls.author, study_set=study_set, title='باق'
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.live_post, author=cls.author, body='تعليق'
+        )
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, body='على منشور محذوف'
+        )
+        Reaction.objects.toggle(cls.reporter.pk, cls.posts[0].pk, 'like')
+
+        for post in cls.posts:
+            post.soft_delete()
+        cls.comment.soft_delete()
+        old = timezone.now() - timedelta(days=40)
+        Post.objects.filter(deleted_at__isnull=False).update(deleted_at=old)
+        Comment.objects.filter(pk=cls.comment.pk).update(deleted_at=old)
+
+        for reported in (cls.posts[0], cls.comment):
+            Report.objects.create(
+                reporter=cls.reporter, content_object=reported, reason='spam'
+            )
+
+    def test_interrupted_run_is_resumed(self):
+        # A first run that stopped after one chunk
+        now = timezone.now()
+        self.assertEqual(archive_posts_chunk(now - RETENTION, now, 1)[0], 1)
+
+        call_command('archive_deleted', batch_size=1, stdout=io.StringIO())
+
+        self.assertFalse(Post.objects.filter(deleted_at__isnull=False).exists())
+        self.assertEqual(
+            sorted(ArchivedPost.objects.values_list('pk', flat=True)),
+            sorted(post.pk for post in self.posts)
+        )
+        self.assertEqual(ArchivedComment.objects.count(), 2)
+        self.assertEqual(ArchivedReaction.objects.count(), 1)
+        self.assertTrue(Post.objects.filter(pk=self.live_post.pk).exists())
+
+        # Nothing left to move
+        call_command('archive_deleted', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(ArchivedPost.objects.count(), 3)
+
+    def test_reports_point_to_archived_copies(self):
+        call_command('archive_deleted', stdout=io.StringIO())
+
+        post_report, comment_report = Report.objects.order_by('pk')
+        self.assertEqual(
+            post_report.content_type, ContentType.objects.get_for_model(ArchivedPost)
+        )
+        self.assertEqual(post_report.content_object.pk, self.posts[0].pk)
+        self.assertEqual(
+            comment_report.content_type,
+            ContentType.objects.get_for_model(ArchivedComment)
+        )
+        self.assertEqual(comment_report.content_object.body, 'تعليق')
+
+
+@override_settings(
+    DATABASE_ROUTERS=['miftah.replicas.ReplicaRouter'],
+    MIDDLEWARE=[*settings.MIDDLEWARE, 'miftah.replicas.ReplicaMiddleware'],
+)
+class ReplicaFeedETagTests(TransactionTestCase):
+    """Feed ETags come from the database the feed is read from."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # The replica as settings.py adds it when DB_REPLICA_HOST is set: a
+        # test mirror of default, reached through a connection of its own.
+        # Added only now, as the test databases are set up without it.
+        default = connections['default'].settings_dict
+        connections.settings[REPLICA] = {
+            **default, 'TEST': {**default['TEST'], 'MIRROR': 'default'},
+        }
+        cls.databases = {'default', REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        viewer = User.objects.create_user('viewer', password='pass')
+        self.author = User.objects.create_user('author', password='pass')
+        self.study_set = StudySet.objects.create(
+            owner=self.author, set_type='quiz', language='ar', source_text='نص'
+        )
+        Post.objects.create(author=self.author, study_set=self.study_set, title='قديم')
+        cache.set(REPLICA_LAG_KEY, 0)
+        self.client.force_login(viewer)
+
+    def tearDown(self):
+        cache.delete(REPLICA_LAG_KEY)
+
+    def test_lagging_replica_gives_the_etag_of_its_page(self):
+        url = reverse('feed:recent')
+        self.client.get(url)  # Sets the CSRF cookie, which is part of the ETag
+        etag = self.client.get(url)['ETag']
+
+        # The replica stops replaying: its reads keep seeing this snapshot
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute('SELECT 1')
+        try:
+            Post.objects.create(author=self.author, study_set=self.study_set, title='جديد')
+            response = self.client.get(url)
+            self.assertNotContains(response, 'جديد')
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        finally:
+            with connections[REPLICA].cursor() as cursor:
+                cursor.execute('ROLLBACK')
+
+        # Caught up
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'جديد')
+
@@ -0,0 +1,97 @@
+"""
+Time-decayed "hot" scores for the trending feed.
+
+A post's heat is the sum of its activity (the post itself, likes and
+comments), each weighted and decayed exponentially by age. Heat changes
+every second, so instead we store log(heat) + DECAY_RATE * (now - EPOCH):
+ordering by that is the same as ordering by heat at any moment, and a
+post's stored score only needs refreshing when its own activity changes.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import (
+    ExpressionWrapper, FloatField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Exp, Extract, Least
+from django.utils import timezone
+
+from .models import Post, Reaction, Comment
+
+HALF_LIFE = timedelta(hours=24)
+DECAY_RATE = math.log(2) / HALF_LIFE.total_seconds()
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+POST_WEIGHT = 1.0
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+
+# Floor for heat so log() stays defined for posts that have fully decayed
+MIN_HEAT = 1e-300
+
+
+def decayed(field, now):
+    """exp(-DECAY_RATE * age) of a datetime field, clamped to avoid underflow."""
+    exponent = ExpressionWrapper(
+        Value(DECAY_RATE) * (Value(now.timestamp()) - Extract(field, 'epoch')),
+        output_field=FloatField()
+    )
+    return Exp(-Least(exponent, Value(700.0)), output_field=FloatField())
+
+
+def active_post_ids(since):
+    """Ids of live posts created, reacted to or commented on since `since`."""
+    post_ids = set(Post.objects.filter(
+        created_at__gte=since,
+        deleted_at__isnull=True
+    ).values_list('pk', flat=True))
+    post_ids.update(Reaction.objects.filter(
+        created_at__gte=since
+    ).values_list('post_id', flat=True))
+    post_ids.update(Comment.objects.filter(
+        created_at__gte=since
+    ).values_list('post_id', flat=True))
+    return post_ids
+
+
+def refresh_hot_scores(post_ids, now=None):
+    """
+    Recompute and store hot_score for the given posts.
+
+    Returns the number of posts updated.
+    """
+    now = now or timezone.now()
+
+    like_heat = Reaction.objects.filter(
+        post=OuterRef('pk'),
+        value='like'
+    ).values('post').annotate(heat=Sum(decayed('created_at', now))).values('heat')
+
+    comment_heat = Comment.objects.filter(
+        post=OuterRef('pk'),
+        deleted_at__isnull=True
+    ).values('post').annotate(heat=Sum(decayed('created_at', now))).values('heat')
+
+    posts = list(Post.objects.filter(
+        pk__in=post_ids,
+        deleted_at__isnull=True
+    ).annotate(
+        post_heat=decayed('created_at', now),
+        like_heat=Coalesce(Subquery(like_heat), Value(0.0)),
+        comment_heat=Coalesce(Subquery(comment_heat), Value(0.0)),
+    ).only('pk'))
+
+    offset = DECAY_RATE * (now - EPOCH).total_seconds()
+
+    for post in posts:
+        heat = (
+            POST_WEIGHT * post.post_heat
+            + LIKE_WEIGHT * post.like_heat
+            + COMMENT_WEIGHT * post.comment_heat
+        )
+        post.hot_score = math.log(max(heat, MIN_HEAT)) + offset
+        post.hot_score_updated_at = now
+
+    Post.objects.bulk_update(posts, ['hot_score', 'hot_score_updated_at'])
+    return len(posts)
@@ -12,6 +12,8 @@ urlpatterns = [
     path('<int:pk>/', views.post_detail, name='detail'),
     path('<int:pk>/delete/', views.delete_post, name='delete'),
     path('<int:pk>/react/', views.toggle_reaction, name='react'),
+    path('<int:pk>/comments/', views.post_comments, name='comments'),
     path('comment/<int:pk>/delete/', views.delete_comment, name='delete_comment'),
     path('search/', views.search_posts, name='search'),
+    path('search/suggest/', views.suggest, name='suggest'),
 ]
@@ -0,0 +1,110 @@
+"""
+Version tokens for conditional (ETag) feed responses.
+
+Rendering a feed is expensive; checking whether it could have changed is
+not. A posts version moves whenever anything shown on a post card is
+written (posts, tags, reactions, comments, author names), and each
+user's Profile.follows_version whenever they follow or unfollow someone.
+A feed's ETag is derived from the versions its content depends on, so an
+unchanged feed is answered with 304 Not Modified after one small query.
+
+The posts and tags versions are VersionCounter rows, so writes from any
+process move them: other web workers, and management commands such as
+purge_deleted and seed_tags. The versions are read from the database the
+feed itself is read from: a lagging replica gives the ETag of the page it
+renders, never that of writes it hasn't replayed yet.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+POSTS = 'posts'
+TAGS = 'tags'
+
+# A single statement, so the row stays locked only while it is updated
+BUMP_SQL = """
+    INSERT INTO posts_versioncounter (name, value) VALUES (%s, 1)
+    ON CONFLICT (name) DO UPDATE SET value = posts_versioncounter.value + 1
+"""
+
+# The posts and tags versions, and the follows version of user_id (NULL
+# when it is None)
+VERSIONS_SQL = """
+    SELECT
+        (SELECT value FROM posts_versioncounter WHERE name = 'posts'),
+        (SELECT value FROM posts_versioncounter WHERE name = 'tags'),
+        (SELECT follows_version FROM accounts_profile WHERE user_id = %(user_id)s)
+"""
+
+
+def bump_version(name, on_commit=True):
+    """
+    Move a version counter. By default this waits until the current
+    transaction commits, so no process can pair the new value with data
+    from before the write.
+    """
+    def bump():
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(BUMP_SQL, [name])
+
+    if on_commit:
+        transaction.on_commit(bump)
+    else:
+        bump()
+
+
+def bump_posts_version():
+    bump_version(POSTS)
+
+
+def get_version(name):
+    """Current value of a version counter (on the primary), as a string."""
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT value FROM posts_versioncounter WHERE name = %s', [name])
+        row = cursor.fetchone()
+    return str(row[0] if row else 0)
+
+
+def get_versions(using, user_id=None):
+    """[posts version, tags version, follows version of user_id] as strings."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(VERSIONS_SQL, {'user_id': user_id})
+        return [str(value) for value in cursor.fetchone()]
+
+
+def make_etag(request, with_follows=False):
+    """
+    ETag for a feed page as seen by the current user, including their
+    follows version if with_follows. Returns None (no conditional
+    handling) while flash messages are waiting to be shown.
+    """
+    from .models import Post
+
+    if len(messages.get_messages(request)):
+        return None
+
+    versions = get_versions(
+        router.db_for_read(Post), request.user.pk if with_follows else None
+    )
+    parts = [
+        *versions,
+        str(request.user.pk),
+        request.get_full_path(),
+        request.headers.get('HX-Request', ''),
+        # The page embeds a CSRF token, which must match the cookie
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    ]
+    return hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def feed_etag(request, *args, **kwargs):
+    """ETag of a feed that shows the same posts whoever the user follows."""
+    return make_etag(request)
+
+
+def following_feed_etag(request, *args, **kwargs):
+    """ETag of the following feed, which also depends on whom the user follows."""
+    return make_etag(request, with_follows=True)
@@ -2,18 +2,36 @@
 Views for posts, reactions, and comments.
 """
 
+import hashlib
+
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import HttpResponse
-from django.views.decorators.http import require_POST
-from django.utils import timezone
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.http import Http404, HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
+from django.views.decorators.vary import vary_on_headers
 from django.db.models import Q
 
+from miftah.caching import cached, invalidate, make_key
+from miftah.pagination import paginate_by_cursor
+from miftah.replicas import replica_reads
 from .models import Post, Tag, Reaction, Comment
+from .feed_views import LATEST_POST_CACHE_KEY
 from .forms import PostForm, CommentForm
+from .tag_registry import get_tags
+from .versioning import feed_etag
 from study.models import StudySet
 
+# Comments shown per page on the post detail page
+COMMENTS_PAGE_SIZE = 20
+
+# Typeahead suggestions
+SUGGESTION_LIMIT = 5
+SUGGESTION_MIN_LENGTH = 2
+SUGGESTION_CACHE_TIMEOUT = 60  # seconds
+
 
 @login_required
 def create_post(request):
@@ -24,11 +42,11 @@ def create_post(request):
 
     if study_set_id:
         preselected_study_set = get_object_or_404(
-            StudySet, pk=study_set_id, owner=request.user
+            StudySet, pk=study_set_id, owner=request.user, deleted_at__isnull=True
         )
 
     # Get all tags for the selector
-    all_tags = Tag.objects.all().order_by('name')
+    all_tags = get_tags()
 
     if request.method == 'POST':
         form = PostForm(request.POST)
@@ -38,22 +56,28 @@ def create_post(request):
             messages.error(request, 'يرجى اختيار مجموعة دراسية.')
             return render(request, 'posts/create.html', {
                 'form': form,
-                'study_sets': StudySet.objects.filter(owner=request.user),
+                'study_sets': StudySet.objects.filter(owner=request.user, deleted_at__isnull=True),
                 'preselected_study_set': preselected_study_set,
                 'all_tags': all_tags,
             })
 
-        study_set = get_object_or_404(StudySet, pk=study_set_id, owner=request.user)
+        study_set = get_object_or_404(
+            StudySet, pk=study_set_id, owner=request.user, deleted_at__isnull=True
+        )
 
         if form.is_valid():
             post = form.save(author=request.user, study_set=study_set)
+            # Let pollers see the new post without waiting out the cache
+            invalidate(LATEST_POST_CACHE_KEY)
             messages.success(request, 'تم نشر المنشور بنجاح!')
             return redirect('posts:detail', pk=post.pk)
     else:
         form = PostForm()
 
     # Get user's study sets for picker
-    study_sets = StudySet.objects.filter(owner=request.user).order_by('-created_at')
+    study_sets = StudySet.objects.filter(
+        owner=request.user, deleted_at__isnull=True
+    ).order_by('-created_at')
 
     return render(request, 'posts/create.html', {
         'form': form,
@@ -64,9 +88,14 @@ def create_post(request):
 
 
 @login_required
+@replica_reads
 def post_detail(request, pk):
     """View post details."""
-    post = get_object_or_404(Post, pk=pk, deleted_at__isnull=True)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'study_set'),
+        pk=pk,
+        deleted_at__isnull=True
+    )
 
     # Handle comment submission
     if request.method == 'POST':
@@ -84,25 +113,52 @@ def post_detail(request, pk):
     # Get user's reaction
     user_reaction = post.get_user_reaction(request.user)
 
-    # Get comments
-    comments = post.comments.filter(deleted_at__isnull=True)
+    # Get first page of comments
+    comments, next_cursor = get_comments_page(post.pk)
 
     return render(request, 'posts/detail.html', {
         'post': post,
         'comment_form': comment_form,
         'comments': comments,
+        'next_cursor': next_cursor,
         'user_reaction': user_reaction,
         'is_owner': post.author == request.user,
     })
 
 
+def get_comments_page(post_id, cursor=None):
+    """
+    Get a page of live comments on a post, newest first, with authors
+    joined in. Returns (comments, next_cursor); next_cursor is None on
+    the last page.
+    """
+    comments = Comment.objects.filter(
+        post_id=post_id,
+        deleted_at__isnull=True
+    ).select_related('author')
+
+    return paginate_by_cursor(comments, cursor, COMMENTS_PAGE_SIZE)
+
+
+@login_required
+@replica_reads
+def post_comments(request, pk):
+    """Next page of a post's comments ("load more"). Returns HTMX partial."""
+    comments, next_cursor = get_comments_page(pk, request.GET.get('after'))
+
+    return render(request, 'posts/partials/comment_list.html', {
+        'post_id': pk,
+        'comments': comments,
+        'next_cursor': next_cursor,
+    })
+
+
 @login_required
 @require_POST
 def delete_post(request, pk):
     """Soft delete a post."""
     post = get_object_or_404(Post, pk=pk, author=request.user)
-    post.deleted_at = timezone.now()
-    post.save()
+    post.soft_delete()
     messages.success(request, 'تم حذف المنشور.')
     return redirect('feed:recent')
 
@@ -111,30 +167,22 @@ def delete_post(request, pk):
 @require_POST
 def toggle_reaction(request, pk):
     """Toggle like/dislike on a post. Returns HTMX partial."""
-    post = get_object_or_404(Post, pk=pk, deleted_at__isnull=True)
     reaction_type = request.POST.get('type')  # 'like' or 'dislike'
 
     if reaction_type not in ['like', 'dislike']:
         return HttpResponse('نوع تفاعل غير صالح', status=400)
 
-    existing = Reaction.objects.filter(user=request.user, post=post).first()
+    # Single atomic statement: toggles the reaction and returns the new counts
+    result = Reaction.objects.toggle(request.user.pk, pk, reaction_type)
+    if result is None:
+        raise Http404('المنشور غير موجود.')
 
-    if existing:
-        if existing.value == reaction_type:
-            # Same reaction - remove it
-            existing.delete()
-        else:
-            # Different reaction - update it
-            existing.value = reaction_type
-            existing.save()
-    else:
-        # New reaction
-        Reaction.objects.create(user=request.user, post=post, value=reaction_type)
+    user_reaction, likes_count, dislikes_count = result
 
-    # Return updated reaction buttons
+    # Return updated reaction buttons, rendered without re-reading the post
     return render(request, 'posts/partials/reaction_buttons.html', {
-        'post': post,
-        'user_reaction': post.get_user_reaction(request.user),
+        'post': Post(pk=pk, likes_count=likes_count, dislikes_count=dislikes_count),
+        'user_reaction': user_reaction,
     })
 
 
@@ -143,19 +191,22 @@ def toggle_reaction(request, pk):
 def delete_comment(request, pk):
     """Soft delete a comment."""
     comment = get_object_or_404(Comment, pk=pk, author=request.user)
-    comment.deleted_at = timezone.now()
-    comment.save()
+    comment.soft_delete()
 
     if request.headers.get('HX-Request'):
         return HttpResponse('')  # HTMX will remove the element
-    return redirect('posts:detail', pk=comment.post.pk)
+    return redirect('posts:detail', pk=comment.post_id)
 
 
 @login_required
+@replica_reads
+@cache_control(private=True, no_cache=True)
+@vary_on_headers('HX-Request')
+@condition(etag_func=feed_etag)
 def search_posts(request):
     """Search posts by keywords and tags."""
     query = request.GET.get('q', '').strip()
-    tag_filter = request.GET.getlist('tags')
+    tag_filter = [int(t) for t in request.GET.getlist('tags') if t.isdigit()]
 
     posts = Post.objects.filter(deleted_at__isnull=True)
 
@@ -167,13 +218,12 @@ def search_posts(request):
         ).distinct()
 
     if tag_filter:
-        for tag_name in tag_filter:
-            posts = posts.filter(tags__name=tag_name)
+        posts = posts.filter(tag_ids__contains=tag_filter)
 
-    posts = posts.order_by('-created_at')
+    posts = posts.select_related('author', 'study_set').order_by('-created_at')
 
     # Get all tags for filter
-    all_tags = Tag.objects.all().order_by('name')
+    all_tags = get_tags()
 
     context = {
         'posts': posts,
@@ -186,3 +236,52 @@ def search_posts(request):
         return render(request, 'posts/partials/post_list.html', context)
 
     return render(request, 'posts/search.html', context)
+
+
+def get_suggestions(query, limit=SUGGESTION_LIMIT):
+    """
+    Get the top matching post titles and tags for a typeahead query.
+    Backed by the trigram indexes; results are cached per query so
+    hot prefixes don't hit the database.
+    """
+    digest = hashlib.md5(query.casefold().encode()).hexdigest()
+
+    def compute():
+        posts = Post.objects.filter(
+            deleted_at__isnull=True,
+            title__icontains=query
+        ).annotate(
+            rank=TrigramWordSimilarity(query, 'title')
+        ).order_by('-rank', '-created_at').values('pk', 'title')[:limit]
+
+        tags = Tag.objects.filter(
+            name__icontains=query
+        ).annotate(
+            rank=TrigramWordSimilarity(query, 'name')
+        ).order_by('-rank', 'name').values('pk', 'name', 'color')[:limit]
+
+        return {'posts': list(posts), 'tags': list(tags)}
+
+    return cached(
+        make_key('posts', 'suggest', limit, digest), compute, SUGGESTION_CACHE_TIMEOUT
+    )
+
+
+@login_required
+@replica_reads
+def suggest(request):
+    """Typeahead suggestions for the search box. Returns HTMX partial or JSON."""
+    query = ' '.join(request.GET.get('q', '').split())
+
+    if len(query) < SUGGESTION_MIN_LENGTH:
+        suggestions = {'posts': [], 'tags': []}
+    else:
+        suggestions = get_suggestions(query)
+
+    if request.headers.get('HX-Request'):
+        return render(request, 'posts/partials/suggestions.html', {
+            'query': query,
+            **suggestions,
+        })
+
+    return JsonResponse(suggestions)
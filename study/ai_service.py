@@ -1,10 +1,16 @@
 """
 AI service for generating flashcards and quizzes using OpenAI API.
+
+Generation calls are async so that a request waiting on OpenAI doesn't
+hold a server thread (see study.views.generate_view).
+
+The openai SDK (with httpx and pydantic) and pypdf take most of a
+second to import, so they are imported on first use rather than when
+the URLconf loads; bench_startup checks they stay that way.
 """
 
 import json
 import re
-from openai import OpenAI
 from django.conf import settings
 
 
@@ -24,8 +30,10 @@ def detect_language(text):
 
 
 def get_openai_client():
-    """Get configured OpenAI client."""
-    return OpenAI(
+    """Get configured async OpenAI client."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
         api_key=settings.OPENAI_API_KEY
     )
 
@@ -51,7 +59,7 @@ def clean_json_response(response_text):
     return cleaned.strip()
 
 
-def generate_flashcards(text, count=10):
+async def generate_flashcards(text, count=10):
     """
     Generate flashcards from the provided text using OpenAI.
 
@@ -99,17 +107,16 @@ Return JSON in this format only:
 {{"flashcards": [{{"question": "Question here", "answer": "Answer here"}}]}}"""
 
     try:
-        client = get_openai_client()
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=4000
-        )
+        async with get_openai_client() as client:
+            response = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=4000
+            )
 
         response_text = response.choices[0].message.content
         cleaned_json = clean_json_response(response_text)
@@ -148,7 +155,7 @@ Return JSON in this format only:
         }
 
 
-def generate_quiz(text, count=10):
+async def generate_quiz(text, count=10):
     """
     Generate quiz questions from the provided text using OpenAI.
 
@@ -210,17 +217,16 @@ Return JSON in this format only:
 {{"questions": [{{"question": "Question here", "options": ["option1", "option2", "option3", "option4"], "correctIndex": 0, "explanation": "A) explanation... B) explanation... C) explanation... D) explanation..."}}]}}"""
 
     try:
-        client = get_openai_client()
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.3,
-            max_tokens=6000
-        )
+        async with get_openai_client() as client:
+            response = await client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=0.3,
+                max_tokens=6000
+            )
 
         response_text = response.choices[0].message.content
         cleaned_json = clean_json_response(response_text)
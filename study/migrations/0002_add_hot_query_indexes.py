@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studyset',
+            index=models.Index(fields=['owner', '-created_at'], name='studyset_owner_recent_idx'),
+        ),
+    ]
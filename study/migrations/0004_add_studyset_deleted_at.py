@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0003_add_studyset_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studyset',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
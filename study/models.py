@@ -47,11 +47,20 @@ class StudySet(models.Model):
         help_text='النص الأصلي المستخدم لإنشاء المجموعة'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the owner deletes the set; the rows are purged later
+    # by the purge_deleted command (see admin_panel.deletion)
+    deleted_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = 'مجموعة دراسية'
         verbose_name_plural = 'المجموعات الدراسية'
         ordering = ['-created_at']
+        indexes = [
+            # History page: a user's study sets, newest first
+            models.Index(fields=['owner', '-created_at'], name='studyset_owner_recent_idx'),
+            # Daily rollups (see admin_panel.rollups)
+            models.Index(fields=['created_at'], name='studyset_created_idx'),
+        ]
 
     def __str__(self):
         return f'{self.get_set_type_display()} - {self.title or "بدون عنوان"}'
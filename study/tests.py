@@ -0,0 +1,32 @@
+"""
+Tests for study set generation.
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from .models import StudySet
+
+
+class GenerateViewTests(TestCase):
+    """Study generation runs as an async view."""
+
+    def test_generate_flashcards(self):
+        async def fake_generate(text, count):
+            cards = [{'question': f'س{i}', 'answer': 'ج'} for i in range(count)]
+            return {'success': True, 'language': 'ar', 'flashcards': cards}
+
+        user = User.objects.create_user('student', password='pass')
+        self.client.force_login(user)
+        with mock.patch('study.views.generate_flashcards', fake_generate):
+            response = self.client.post(reverse('study:generate', args=['flashcards']), {
+                'set_type': 'flashcards', 'input_type': 'text',
+                'text_content': 'نص ' * 50, 'count': 3,
+            })
+
+        study_set = StudySet.objects.get(owner=user)
+        self.assertRedirects(response, reverse('study:detail', args=[study_set.pk]))
+        self.assertEqual(study_set.flashcards.count(), 3)
@@ -2,21 +2,66 @@
 Views for study set generation and viewing.
 """
 
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db import transaction
 from django.http import HttpResponseForbidden, JsonResponse
 
+from admin_panel.deletion import schedule_study_set_deletion
+from miftah.replicas import replica_reads
 from .models import StudySet, Flashcard, QuizQuestion
 from .forms import GenerateStudySetForm
 from .ai_service import generate_flashcards, generate_quiz, extract_text_from_pdf
 
 
+def save_study_set(user, set_type, title, text, result):
+    """Store a generated study set and its items."""
+    with transaction.atomic():
+        study_set = StudySet.objects.create(
+            owner=user,
+            set_type=set_type,
+            language=result['language'],
+            title=title,
+            source_text=text[:5000]  # Limit stored text
+        )
+
+        if set_type == 'flashcards':
+            Flashcard.objects.bulk_create([
+                Flashcard(
+                    study_set=study_set,
+                    index=i,
+                    question=card['question'],
+                    answer=card['answer']
+                )
+                for i, card in enumerate(result['flashcards'])
+            ])
+        else:
+            QuizQuestion.objects.bulk_create([
+                QuizQuestion(
+                    study_set=study_set,
+                    index=i,
+                    question=q['question'],
+                    options=q['options'],
+                    correct_index=q['correctIndex'],
+                    explanation=q['explanation']
+                )
+                for i, q in enumerate(result['questions'])
+            ])
+
+    return study_set
+
+
 @login_required
-def generate_view(request, set_type):
+async def generate_view(request, set_type):
     """
     Generate a new study set (flashcards or quiz).
     set_type: 'flashcards' or 'quiz'
+
+    Async, so a request waiting on OpenAI for tens of seconds doesn't
+    hold a server thread. Blocking work (PDF parsing, rendering, the
+    database) runs in threads.
     """
     if set_type not in ['flashcards', 'quiz']:
         return redirect('home')
@@ -31,10 +76,10 @@ def generate_view(request, set_type):
 
             # Get text content
             if input_type == 'pdf':
-                pdf_result = extract_text_from_pdf(request.FILES['pdf_file'])
+                pdf_result = await sync_to_async(extract_text_from_pdf)(request.FILES['pdf_file'])
                 if not pdf_result['success']:
                     messages.error(request, pdf_result['error'])
-                    return render(request, 'study/generate.html', {
+                    return await sync_to_async(render)(request, 'study/generate.html', {
                         'form': form,
                         'set_type': set_type
                     })
@@ -44,62 +89,39 @@ def generate_view(request, set_type):
 
             # Generate content using AI
             if set_type == 'flashcards':
-                result = generate_flashcards(text, count)
+                result = await generate_flashcards(text, count)
             else:
-                result = generate_quiz(text, count)
+                result = await generate_quiz(text, count)
 
             if not result['success']:
                 messages.error(request, result['error'])
-                return render(request, 'study/generate.html', {
+                return await sync_to_async(render)(request, 'study/generate.html', {
                     'form': form,
                     'set_type': set_type
                 })
 
-            # Create StudySet
-            study_set = StudySet.objects.create(
-                owner=request.user,
-                set_type=set_type,
-                language=result['language'],
-                title=title,
-                source_text=text[:5000]  # Limit stored text
+            study_set = await sync_to_async(save_study_set)(
+                await request.auser(), set_type, title, text, result
             )
 
-            # Create items
-            if set_type == 'flashcards':
-                for i, card in enumerate(result['flashcards']):
-                    Flashcard.objects.create(
-                        study_set=study_set,
-                        index=i,
-                        question=card['question'],
-                        answer=card['answer']
-                    )
-            else:
-                for i, q in enumerate(result['questions']):
-                    QuizQuestion.objects.create(
-                        study_set=study_set,
-                        index=i,
-                        question=q['question'],
-                        options=q['options'],
-                        correct_index=q['correctIndex'],
-                        explanation=q['explanation']
-                    )
-
             messages.success(request, 'تم إنشاء المجموعة بنجاح!')
             return redirect('study:detail', pk=study_set.pk)
 
     else:
         form = GenerateStudySetForm(initial={'set_type': set_type})
 
-    return render(request, 'study/generate.html', {
+    # Templates read request.user, which loads lazily from the database
+    return await sync_to_async(render)(request, 'study/generate.html', {
         'form': form,
         'set_type': set_type
     })
 
 
 @login_required
+@replica_reads
 def study_set_detail(request, pk):
     """View a study set (flashcards or quiz)."""
-    study_set = get_object_or_404(StudySet, pk=pk)
+    study_set = get_object_or_404(StudySet, pk=pk, deleted_at__isnull=True)
 
     # Check access: owner can always view, others only if shared
     if study_set.owner != request.user:
@@ -120,10 +142,12 @@ def study_set_detail(request, pk):
 
 
 @login_required
+@replica_reads
 def history_view(request):
     """View user's study set history."""
     study_sets = StudySet.objects.filter(
-        owner=request.user
+        owner=request.user,
+        deleted_at__isnull=True
     ).order_by('-created_at')
 
     # Filter by type if specified
@@ -140,10 +164,11 @@ def history_view(request):
 @login_required
 def delete_study_set(request, pk):
     """Delete a study set."""
-    study_set = get_object_or_404(StudySet, pk=pk, owner=request.user)
+    study_set = get_object_or_404(StudySet, pk=pk, owner=request.user, deleted_at__isnull=True)
 
     if request.method == 'POST':
-        study_set.delete()
+        # Hidden now; the flashcards, questions and posts are purged in the background
+        schedule_study_set_deletion(study_set)
         messages.success(request, 'تم حذف المجموعة بنجاح.')
         return redirect('study:history')
 
@@ -153,9 +178,10 @@ def delete_study_set(request, pk):
 
 
 @login_required
+@replica_reads
 def study_set_json(request, pk):
     """Return study set data as JSON (for HTMX picker)."""
-    study_set = get_object_or_404(StudySet, pk=pk, owner=request.user)
+    study_set = get_object_or_404(StudySet, pk=pk, owner=request.user, deleted_at__isnull=True)
 
     data = {
         'id': study_set.pk,